@@ -2,6 +2,7 @@
 import os
 import csv
 import logging
+import importlib
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
@@ -19,6 +20,9 @@ ALL_SCOPES = SCOPES_SLIDES + SCOPES_DRIVE
 # Token CSV location
 TOKEN_CSV_PATH = "tokens.csv"
 
+# Module providing stand-in services instead of Google's, e.g. "fake_backend" for load tests
+BACKEND_MODULE = os.getenv("SLIDES_MCP_BACKEND")
+
 def save_tokens_to_csv(creds: Credentials, path: str = TOKEN_CSV_PATH):
     """Save credentials to a CSV file."""
     with open(path, mode='w', newline='') as file:
@@ -77,7 +81,11 @@ def _build_creds(scopes: list) -> Credentials:
     return creds
 
 def get_slides_service():
+    if BACKEND_MODULE:
+        return importlib.import_module(BACKEND_MODULE).get_slides_service()
     return build("slides", "v1", credentials=_build_creds(ALL_SCOPES))
 
 def get_drive_service():
+    if BACKEND_MODULE:
+        return importlib.import_module(BACKEND_MODULE).get_drive_service()
     return build("drive", "v3", credentials=_build_creds(ALL_SCOPES))
\ No newline at end of file
@@ -0,0 +1,525 @@
+# fake_backend.py
+"""
+In-memory stand-in for the Google Slides and Drive APIs.
+
+Selected with SLIDES_MCP_BACKEND=fake_backend (see auth.py) so the server can
+be benchmarked without touching Google. It mimics the client-library call
+chains used by tools.py, honors `fields` masks, and returns fresh copies of
+the stored JSON like the real client does.
+
+Exports return a small placeholder file rather than a rendering of the deck,
+and thumbnail URLs point at a placeholder PNG served from 127.0.0.1, so the
+export and thumbnail tools run end to end.
+
+Environment:
+- SLIDES_FAKE_LATENCY_MS: simulated round-trip time per API call (default 0)
+- SLIDES_FAKE_SEED: decks to create at startup, e.g. "decks=8,slides=40,images=3".
+  Decks are named loadtest-0, loadtest-1, ...
+- SLIDES_FAKE_STATS: JSON file rewritten by a background thread every
+  STATS_FLUSH_SECONDS with call counts, the process's current and peak RSS,
+  and the time it was written
+"""
+import os
+import base64
+import copy
+import json
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+LATENCY_SECONDS = float(os.getenv("SLIDES_FAKE_LATENCY_MS", "0")) / 1000
+STATS_PATH = os.getenv("SLIDES_FAKE_STATS")
+STATS_FLUSH_SECONDS = 0.05
+
+# 1x1 transparent PNG served as every slide thumbnail
+PLACEHOLDER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+_lock = threading.RLock()
+_presentations: dict[str, dict] = {}
+_files: dict[str, dict] = {}
+_permissions: dict[str, list] = {}
+_calls = Counter()
+
+
+def _error(status: int, message: str) -> HttpError:
+    return HttpError(httplib2.Response({"status": status}), message.encode())
+
+
+def _new_id(prefix: str) -> str:
+    return f"{prefix}_{uuid.uuid4().hex[:16]}"
+
+
+def _memory_kb() -> dict:
+    usage = {}
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    key, value = line.split(":")
+                    usage["rss_kb" if key == "VmRSS" else "peak_rss_kb"] = int(value.split()[0])
+    except OSError:
+        import resource
+        usage["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
+
+
+def _write_stats():
+    with _lock:
+        calls = dict(_calls)
+    stats = {"calls": calls, "total": sum(calls.values()), **_memory_kb(), "written_at": time.time()}
+    tmp_path = f"{STATS_PATH}.tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(stats, fh)
+    os.replace(tmp_path, STATS_PATH)
+
+
+def _flush_stats():
+    """Rewrites the stats file periodically, so API calls never wait on file I/O."""
+    while True:
+        try:
+            _write_stats()
+        except OSError:
+            pass
+        time.sleep(STATS_FLUSH_SECONDS)
+
+
+if STATS_PATH:
+    threading.Thread(target=_flush_stats, name="fake-stats", daemon=True).start()
+
+
+# Placeholder file server for thumbnail URLs
+
+class _PlaceholderHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(PLACEHOLDER_PNG)))
+        self.end_headers()
+        self.wfile.write(PLACEHOLDER_PNG)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server = None
+
+
+def _placeholder_url(name: str) -> str:
+    """Returns a local URL serving PLACEHOLDER_PNG, starting the server on first use."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", 0), _PlaceholderHandler)
+            threading.Thread(target=_server.serve_forever, name="fake-files", daemon=True).start()
+    return f"http://127.0.0.1:{_server.server_port}/{name}"
+
+
+# Field masks
+
+def _parse_fields(fields: str) -> dict:
+    """Parses a field mask like "slides(objectId,pageElements(objectId))" into a nested dict."""
+    tree = {}
+    stack = [tree]
+    name = ""
+    for char in fields + ",":
+        if char not in ",()":
+            name += char
+            continue
+        node = stack[-1]
+        path = [part for part in name.strip().split(".") if part]
+        for part in path[:-1]:
+            if node.get(part) is None:
+                node[part] = {}
+            node = node[part]
+        if char == "(":
+            if node.get(path[-1]) is None:
+                node[path[-1]] = {}
+            stack.append(node[path[-1]])
+        elif path:
+            node.setdefault(path[-1], None)
+        if char == ")":
+            stack.pop()
+        name = ""
+    return tree
+
+
+def _apply_fields(value, tree):
+    if tree is None:
+        return copy.deepcopy(value)
+    if isinstance(value, list):
+        return [_apply_fields(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _apply_fields(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+class _Request:
+    def __init__(self, method: str, func, fields: str = None):
+        self.method = method
+        self.func = func
+        self.fields = fields
+
+    def execute(self, **kwargs):
+        if LATENCY_SECONDS:
+            time.sleep(LATENCY_SECONDS)
+        with _lock:
+            _calls[self.method] += 1
+            result = self.func()
+        # Stored decks are replaced, never changed in place, so copying can happen outside the lock
+        return _apply_fields(result, _parse_fields(self.fields) if self.fields else None)
+
+
+# Slides
+
+def _text_elements(content: str) -> list:
+    elements, index = [], 0
+    for line in content.splitlines(keepends=True):
+        elements.append({"startIndex": index, "endIndex": index + len(line), "paragraphMarker": {"style": {}}})
+        elements.append({"startIndex": index, "endIndex": index + len(line),
+                         "textRun": {"content": line, "style": {}}})
+        index += len(line)
+    return elements
+
+
+def _shape_text(element: dict) -> str:
+    text = element.get("shape", {}).get("text", {})
+    return "".join(e["textRun"]["content"] for e in text.get("textElements", []) if "textRun" in e)
+
+
+def _set_shape_text(element: dict, content: str):
+    element["shape"]["text"] = {"textElements": _text_elements(content)}
+
+
+def _new_slide(object_id: str) -> dict:
+    return {
+        "objectId": object_id,
+        "pageType": "SLIDE",
+        "pageElements": [],
+        "slideProperties": {"layoutObjectId": "layout_blank", "masterObjectId": "master"},
+        "notesPage": {"objectId": f"{object_id}_notes", "pageType": "NOTES", "pageElements": []},
+    }
+
+
+def _new_presentation(title: str) -> dict:
+    presentation_id = _new_id("deck")
+    now = datetime.now().isoformat()
+    _presentations[presentation_id] = {
+        "presentationId": presentation_id,
+        "title": title,
+        "revisionId": uuid.uuid4().hex,
+        "pageSize": {"width": {"magnitude": 9144000, "unit": "EMU"}, "height": {"magnitude": 5143500, "unit": "EMU"}},
+        "slides": [_new_slide(_new_id("slide"))],
+        "layouts": [],
+        "masters": [],
+    }
+    _files[presentation_id] = {"id": presentation_id, "name": title, "createdTime": now, "modifiedTime": now}
+    return _presentations[presentation_id]
+
+
+def _presentation(presentation_id: str) -> dict:
+    if presentation_id not in _presentations:
+        raise _error(404, f"Requested entity was not found: {presentation_id}")
+    return _presentations[presentation_id]
+
+
+def _all_ids(presentation: dict) -> set:
+    ids = set()
+    for slide in presentation["slides"]:
+        ids.add(slide["objectId"])
+        ids.update(element["objectId"] for element in slide["pageElements"])
+    return ids
+
+
+def _stage(presentation: dict) -> dict:
+    """
+    Returns a copy of the deck to apply a batchUpdate to.
+
+    Slides are shared with the original until `_writable` copies them, so a
+    batch costs memory in proportion to the slides it changes.
+    """
+    staged = dict(presentation, slides=list(presentation["slides"]))
+    staged["_shared"] = {id(slide) for slide in staged["slides"]}
+    return staged
+
+
+def _writable(presentation: dict, slide: dict) -> dict:
+    shared = presentation.get("_shared")
+    if shared is None or id(slide) not in shared:
+        return slide
+    shared.discard(id(slide))
+    slides = presentation["slides"]
+    copied = copy.deepcopy(slide)
+    slides[next(i for i, s in enumerate(slides) if s is slide)] = copied
+    return copied
+
+
+def _find_element(presentation: dict, object_id: str, writable: bool = False) -> dict:
+    for slide in presentation["slides"]:
+        for i, element in enumerate(slide["pageElements"]):
+            if element["objectId"] == object_id:
+                return _writable(presentation, slide)["pageElements"][i] if writable else element
+    raise _error(400, f"Invalid requests: object {object_id} not found")
+
+
+def _find_slide(presentation: dict, object_id: str, writable: bool = False) -> dict:
+    for slide in presentation["slides"]:
+        if slide["objectId"] == object_id:
+            return _writable(presentation, slide) if writable else slide
+    raise _error(400, f"Invalid requests: page {object_id} not found")
+
+
+def _claim_id(presentation: dict, object_id: str, prefix: str) -> str:
+    object_id = object_id or _new_id(prefix)
+    if object_id in _all_ids(presentation):
+        raise _error(400, f"Invalid requests: the object ID ({object_id}) should be unique")
+    return object_id
+
+
+def _page_element(presentation: dict, object_id: str, properties: dict, prefix: str) -> dict:
+    object_id = _claim_id(presentation, object_id, prefix)
+    element = {
+        "objectId": object_id,
+        "size": copy.deepcopy(properties.get("size", {})),
+        "transform": copy.deepcopy(properties.get("transform", {})),
+    }
+    _find_slide(presentation, properties["pageObjectId"], writable=True)["pageElements"].append(element)
+    return element
+
+
+def _apply_request(presentation: dict, request: dict) -> dict:
+    (kind, params), = request.items()
+    slides = presentation["slides"]
+
+    if kind == "createSlide":
+        object_id = _claim_id(presentation, params.get("objectId"), "slide")
+        slides.insert(params.get("insertionIndex", len(slides)), _new_slide(object_id))
+        return {"createSlide": {"objectId": object_id}}
+    if kind == "createShape":
+        element = _page_element(presentation, params.get("objectId"), params["elementProperties"], "shape")
+        element["shape"] = {"shapeType": params["shapeType"], "shapeProperties": {}}
+        _set_shape_text(element, "")
+        return {"createShape": {"objectId": element["objectId"]}}
+    if kind == "createImage":
+        element = _page_element(presentation, params.get("objectId"), params["elementProperties"], "image")
+        element["image"] = {
+            "contentUrl": f"https://lh7-us.googleusercontent.com/{uuid.uuid4().hex * 4}",
+            "sourceUrl": params["url"],
+            "imageProperties": {},
+        }
+        return {"createImage": {"objectId": element["objectId"]}}
+    if kind == "insertText":
+        element = _find_element(presentation, params["objectId"], writable=True)
+        content = _shape_text(element)
+        index = params.get("insertionIndex", 0)
+        _set_shape_text(element, content[:index] + params["text"] + content[index:])
+        return {}
+    if kind == "deleteText":
+        element = _find_element(presentation, params["objectId"], writable=True)
+        content = _shape_text(element)
+        text_range = params["textRange"]
+        start = text_range.get("startIndex", 0)
+        end = text_range.get("endIndex", len(content))
+        _set_shape_text(element, content[:start] + content[end:])
+        return {}
+    if kind in ("updateTextStyle", "updateParagraphStyle", "createParagraphBullets"):
+        _find_element(presentation, params["objectId"])
+        return {}
+    if kind == "replaceAllText":
+        find = params["containsText"]["text"]
+        changed = 0
+        for slide in list(slides):
+            for i, element in enumerate(slide["pageElements"]):
+                content = _shape_text(element)
+                if find in content:
+                    changed += content.count(find)
+                    slide = _writable(presentation, slide)
+                    _set_shape_text(slide["pageElements"][i], content.replace(find, params["replaceText"]))
+        return {"replaceAllText": {"occurrencesChanged": changed}}
+    if kind == "deleteObject":
+        object_id = params["objectId"]
+        for i, slide in enumerate(slides):
+            if slide["objectId"] == object_id:
+                del slides[i]
+                return {}
+            for j, element in enumerate(slide["pageElements"]):
+                if element["objectId"] == object_id:
+                    del _writable(presentation, slide)["pageElements"][j]
+                    return {}
+        raise _error(400, f"Invalid requests: object {object_id} not found")
+    if kind == "updateSlidesPosition":
+        moving = [_find_slide(presentation, object_id) for object_id in params["slideObjectIds"]]
+        moving_ids = set(params["slideObjectIds"])
+        index = params["insertionIndex"] - sum(
+            1 for slide in slides[:params["insertionIndex"]] if slide["objectId"] in moving_ids
+        )
+        remaining = [slide for slide in slides if slide["objectId"] not in moving_ids]
+        slides[:] = remaining[:index] + moving + remaining[index:]
+        return {}
+    if kind == "duplicateObject":
+        original = _find_slide(presentation, params["objectId"])
+        mapping = params.get("objectIds", {})
+        copy_slide = copy.deepcopy(original)
+        copy_slide["objectId"] = _claim_id(presentation, mapping.get(original["objectId"]), "slide")
+        copy_slide["notesPage"]["objectId"] = f"{copy_slide['objectId']}_notes"
+        for element in copy_slide["pageElements"]:
+            element["objectId"] = _claim_id(presentation, mapping.get(element["objectId"]), "element")
+        slides.insert(slides.index(original) + 1, copy_slide)
+        return {"duplicateObject": {"objectId": copy_slide["objectId"]}}
+    raise _error(400, f"Invalid requests: unsupported request {kind}")
+
+
+class _Pages:
+    def getThumbnail(self, presentationId, pageObjectId, **kwargs):
+        def run():
+            _find_slide(_presentation(presentationId), pageObjectId)
+            return {"width": 1600, "height": 900, "contentUrl": _placeholder_url(f"{pageObjectId}.png")}
+        return _Request("slides.pages.getThumbnail", run)
+
+
+class _Presentations:
+    def create(self, body):
+        return _Request("slides.presentations.create", lambda: _new_presentation(body.get("title", "Untitled")))
+
+    def get(self, presentationId, fields=None):
+        return _Request("slides.presentations.get", lambda: _presentation(presentationId), fields)
+
+    def batchUpdate(self, presentationId, body):
+        def run():
+            presentation = _presentation(presentationId)
+            # Requests are applied to a staged copy so a failing batch changes nothing
+            staged = _stage(presentation)
+            replies = [_apply_request(staged, request) for request in body["requests"]]
+            del staged["_shared"]
+            staged["revisionId"] = uuid.uuid4().hex
+            _presentations[presentationId] = staged
+            _files[presentationId]["modifiedTime"] = datetime.now().isoformat()
+            return {"presentationId": presentationId, "replies": replies}
+        return _Request("slides.presentations.batchUpdate", run)
+
+    def pages(self):
+        return _Pages()
+
+
+class SlidesService:
+    def presentations(self):
+        return _Presentations()
+
+
+# Drive
+
+class _Files:
+    def list(self, q="", fields=None, pageToken=None, **kwargs):
+        def run():
+            match = re.search(r"name\s*=\s*'([^']*)'", q)
+            contains = re.search(r"name contains '([^']*)'", q)
+            files = [
+                file for file in _files.values()
+                if (not match or file["name"] == match.group(1))
+                and (not contains or contains.group(1) in file["name"])
+            ]
+            return {"files": files}
+        return _Request("drive.files.list", run, fields)
+
+    def get(self, fileId, fields=None):
+        def run():
+            if fileId not in _files:
+                raise _error(404, f"File not found: {fileId}")
+            return _files[fileId]
+        return _Request("drive.files.get", run, fields)
+
+    def export_media(self, fileId, mimeType):
+        return _MediaRequest(fileId, mimeType)
+
+
+class _MediaHttp:
+    """Answers the GET issued by MediaIoBaseDownload with a placeholder export."""
+
+    def __init__(self, file_id: str, mime_type: str):
+        self.file_id = file_id
+        self.mime_type = mime_type
+
+    def request(self, uri, method="GET", **kwargs):
+        if LATENCY_SECONDS:
+            time.sleep(LATENCY_SECONDS)
+        with _lock:
+            _calls["drive.files.export_media"] += 1
+            if self.file_id not in _files:
+                return httplib2.Response({"status": 404}), f"File not found: {self.file_id}".encode()
+            name = _files[self.file_id]["name"]
+            slide_count = len(_presentations[self.file_id]["slides"])
+        content = f"Placeholder {self.mime_type} export of {name} ({slide_count} slides)\n".encode()
+        return httplib2.Response({"status": 200, "content-length": str(len(content))}), content
+
+
+class _MediaRequest:
+    """The parts of googleapiclient's HttpRequest that MediaIoBaseDownload uses."""
+
+    def __init__(self, file_id: str, mime_type: str):
+        self.uri = f"fake://drive/files/{file_id}/export?mimeType={mime_type}"
+        self.headers = {}
+        self.http = _MediaHttp(file_id, mime_type)
+
+
+class _Permissions:
+    def create(self, fileId, body, fields=None, **kwargs):
+        def run():
+            permission = dict(body, id=_new_id("permission"))
+            _permissions.setdefault(fileId, []).append(permission)
+            return permission
+        return _Request("drive.permissions.create", run, fields)
+
+
+class DriveService:
+    def files(self):
+        return _Files()
+
+    def permissions(self):
+        return _Permissions()
+
+
+def get_slides_service():
+    return SlidesService()
+
+
+def get_drive_service():
+    return DriveService()
+
+
+def seed(decks: int = 0, slides: int = 10, images: int = 0, texts: int = 2):
+    """Creates decks named loadtest-<n>, each with the given number of slides, text boxes and images."""
+    geometry = {"size": {"width": {"magnitude": 300, "unit": "PT"}, "height": {"magnitude": 100, "unit": "PT"}},
+                "transform": {"scaleX": 1, "scaleY": 1, "unit": "PT"}}
+    with _lock:
+        for n in range(decks):
+            presentation = _new_presentation(f"loadtest-{n}")
+            requests = []
+            for i in range(slides):
+                slide_id = f"seed_slide_{i}"
+                requests.append({"createSlide": {"objectId": slide_id}})
+                for j in range(texts):
+                    shape_id = f"seed_text_{i}_{j}"
+                    requests.append({"createShape": {"objectId": shape_id, "shapeType": "TEXT_BOX",
+                                                     "elementProperties": dict(geometry, pageObjectId=slide_id)}})
+                    requests.append({"insertText": {"objectId": shape_id,
+                                                     "text": f"Slide {i} text {j}\nSeeded for load testing"}})
+                for j in range(images):
+                    requests.append({"createImage": {"objectId": f"seed_image_{i}_{j}",
+                                                     "url": f"https://example.com/{i}/{j}.png",
+                                                     "elementProperties": dict(geometry, pageObjectId=slide_id)}})
+            for request in requests:
+                _apply_request(presentation, request)
+
+
+if os.getenv("SLIDES_FAKE_SEED"):
+    seed(**{key: int(value) for key, value in
+            (item.split("=") for item in os.environ["SLIDES_FAKE_SEED"].split(","))})
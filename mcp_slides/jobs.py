@@ -0,0 +1,333 @@
+# jobs.py
+import os
+import json
+import socket
+import sqlite3
+import logging
+import threading
+import time
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+# SQLite database holding job state, so jobs survive a server restart
+JOBS_DB_PATH = os.getenv("SLIDES_JOBS_DB", "jobs.db")
+JOB_WORKERS = int(os.getenv("SLIDES_JOB_WORKERS", "4"))
+# A job whose owner has not sent a heartbeat for this long is taken over by another server process
+JOB_LEASE_SECONDS = float(os.getenv("SLIDES_JOB_LEASE_SECONDS", "60"))
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    Persists jobs and their partial results in SQLite.
+
+    A connection is opened per operation, so the store can be shared by the
+    worker threads. Several server processes may share one database; each
+    unfinished job is leased to the process that owns it, which renews the
+    lease with heartbeats.
+    """
+
+    def __init__(self, path: str = JOBS_DB_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT,
+                    params TEXT,
+                    status TEXT,
+                    progress INTEGER DEFAULT 0,
+                    total INTEGER,
+                    checkpoint INTEGER DEFAULT 0,
+                    result TEXT,
+                    error TEXT,
+                    created TEXT,
+                    updated TEXT,
+                    owner TEXT,
+                    heartbeat REAL
+                )
+            """)
+            # Databases created before leases were added lack the owner columns
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, column_type in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_results (
+                    job_id TEXT,
+                    seq INTEGER,
+                    result TEXT,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_markers (
+                    job_id TEXT,
+                    key TEXT,
+                    PRIMARY KEY (job_id, key)
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind: str, params: dict, owner: str, total: Optional[int] = None) -> str:
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO jobs (id, kind, params, status, total, created, updated, owner, heartbeat)
+                VALUES (?, ?, ?, 'queued', ?, ?, ?, ?, ?)
+            """, (job_id, kind, json.dumps(params), total, now, now, owner, time.time()))
+        return job_id
+
+    def claim(self, job_id: str, owner: str, lease: float = JOB_LEASE_SECONDS) -> bool:
+        """
+        Marks an unfinished job as running under `owner`, in one statement.
+
+        Succeeds only if `owner` already holds the lease or the previous owner's
+        lease has expired, so two processes never run the same job.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(f"""
+                UPDATE jobs SET status = 'running', owner = ?, heartbeat = ?, updated = ?
+                WHERE id = ? AND status IN ({', '.join('?' * len(UNFINISHED_STATUSES))})
+                AND (owner = ? OR heartbeat IS NULL OR heartbeat < ?)
+            """, (owner, now, datetime.now().isoformat(), job_id, *UNFINISHED_STATUSES, owner, now - lease))
+            return cursor.rowcount == 1
+
+    def heartbeat(self, owner: str):
+        """Renews the lease on every unfinished job held by `owner`."""
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat = ? WHERE owner = ? "
+                f"AND status IN ({', '.join('?' * len(UNFINISHED_STATUSES))})",
+                (time.time(), owner, *UNFINISHED_STATUSES)
+            )
+
+    def update(self, job_id: str, **fields):
+        fields["updated"] = datetime.now().isoformat()
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        columns = ", ".join(f"{key} = ?" for key in fields)
+        with self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def commit_step(self, job_id: str, result=None):
+        """Records one committed unit of work: advances the checkpoint and stores its result."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT checkpoint FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            step = row["checkpoint"]
+            if result is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_results (job_id, seq, result) VALUES (?, ?, ?)",
+                    (job_id, step, json.dumps(result))
+                )
+            conn.execute(
+                "UPDATE jobs SET checkpoint = ?, progress = ?, updated = ? WHERE id = ?",
+                (step + 1, step + 1, datetime.now().isoformat(), job_id)
+            )
+
+    def append_result(self, job_id: str, result):
+        """Stores a partial result without advancing the checkpoint."""
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO job_results (job_id, seq, result)
+                VALUES (?, (SELECT COALESCE(MAX(seq), -1) + 1 FROM job_results WHERE job_id = ?), ?)
+            """, (job_id, job_id, json.dumps(result)))
+            conn.execute(
+                "UPDATE jobs SET progress = progress + 1, updated = ? WHERE id = ?",
+                (datetime.now().isoformat(), job_id)
+            )
+
+    def add_marker(self, job_id: str, key: str):
+        """Durably records that the job reached `key`, e.g. that it started writing to a deck."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR IGNORE INTO job_markers (job_id, key) VALUES (?, ?)", (job_id, key))
+
+    def markers(self, job_id: str) -> set[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT key FROM job_markers WHERE job_id = ?", (job_id,)).fetchall()
+        return {row["key"] for row in rows}
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+    def results(self, job_id: str, since: int = 0) -> list[tuple[int, object]]:
+        """Returns (seq, result) pairs recorded at or after position `since`."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, result FROM job_results WHERE job_id = ? AND seq >= ? ORDER BY seq",
+                (job_id, since)
+            ).fetchall()
+        return [(row["seq"], json.loads(row["result"])) for row in rows]
+
+    def abandoned(self, lease: float = JOB_LEASE_SECONDS) -> list[str]:
+        """IDs of unfinished jobs whose owner's lease has expired, oldest first."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({', '.join('?' * len(UNFINISHED_STATUSES))}) "
+                f"AND (heartbeat IS NULL OR heartbeat < ?) ORDER BY created",
+                (*UNFINISHED_STATUSES, time.time() - lease)
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class Job:
+    """
+    Handle passed to a job handler.
+
+    `checkpoint` is the number of steps committed by earlier runs; a resumed
+    handler starts from there. Call `commit` after each step that changed a
+    presentation, e.g. after each batchUpdate.
+    """
+
+    def __init__(self, store: JobStore, job_id: str, checkpoint: int):
+        self.store = store
+        self.id = job_id
+        self.checkpoint = checkpoint
+
+    def commit(self, result=None):
+        self.store.commit_step(self.id, result)
+        self.checkpoint += 1
+
+    def report(self, result):
+        self.store.append_result(self.id, result)
+
+    def results(self) -> list:
+        """Partial results recorded so far, including those of earlier runs."""
+        return [result for _, result in self.store.results(self.id)]
+
+    def mark(self, key: str):
+        """Records that work on `key` started, so a resumed run can tell it may be half done."""
+        self.store.add_marker(self.id, key)
+
+    def marked(self) -> set[str]:
+        """Keys marked so far, including by earlier runs."""
+        return self.store.markers(self.id)
+
+
+class JobQueue:
+    """
+    Runs registered job handlers on a worker pool and tracks them in a JobStore.
+
+    Jobs are leased to this queue's `owner` while queued or running. A
+    background thread renews those leases and takes over jobs whose owner
+    stopped renewing, e.g. because its server process exited.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = JOB_WORKERS, lease: float = JOB_LEASE_SECONDS):
+        self.store = store
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: dict[str, Callable] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="slides-job")
+        self._resuming = False
+        # Jobs queued or running in this process, so a resume never submits one twice
+        self._local: set[str] = set()
+        self._local_lock = threading.Lock()
+        threading.Thread(target=self._keep_leases, name="slides-job-lease", daemon=True).start()
+
+    def handler(self, kind: str):
+        """Registers `func(job, params)` as the handler for jobs of the given kind."""
+        def register(func: Callable) -> Callable:
+            self.handlers[kind] = func
+            return func
+        return register
+
+    def submit(self, kind: str, params: dict, total: Optional[int] = None) -> str:
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        job_id = self.store.create(kind, params, self.owner, total)
+        self._enqueue(job_id)
+        return job_id
+
+    def _enqueue(self, job_id: str) -> bool:
+        with self._local_lock:
+            if job_id in self._local:
+                return False
+            self._local.add(job_id)
+        self.executor.submit(self._run, job_id)
+        return True
+
+    def resume(self) -> list[str]:
+        """Requeues unfinished jobs whose owner's lease has expired, e.g. those of a process that exited."""
+        self._resuming = True
+        return [job_id for job_id in self.store.abandoned(self.lease) if self._enqueue(job_id)]
+
+    def _keep_leases(self):
+        while True:
+            time.sleep(self.lease / 3)
+            try:
+                self.store.heartbeat(self.owner)
+                if self._resuming:
+                    self.resume()
+            except Exception:
+                logger.error("Renewing job leases failed:\n%s", traceback.format_exc())
+
+    def status(self, job_id: str, since: int = 0) -> dict:
+        job = self.store.get(job_id)
+        if job is None:
+            raise ValueError(f"No job found with ID: {job_id}")
+        results = self.store.results(job_id, since)
+        return {
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "total": job["total"],
+            "created": job["created"],
+            "updated": job["updated"],
+            "result": job["result"],
+            "error": job["error"],
+            "partial_results": [result for _, result in results],
+            "next_since": results[-1][0] + 1 if results else since
+        }
+
+    def _run(self, job_id: str):
+        try:
+            self._run_claimed(job_id)
+        finally:
+            with self._local_lock:
+                self._local.discard(job_id)
+
+    def _run_claimed(self, job_id: str):
+        if not self.store.claim(job_id, self.owner, self.lease):
+            # Another process took the job over or finished it
+            return
+        # Read after claiming, so a job taken over resumes from the latest checkpoint
+        job = self.store.get(job_id)
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            self.store.update(job_id, status="failed", error=f"Unknown job kind: {job['kind']}")
+            return
+
+        try:
+            result = handler(Job(self.store, job_id, job["checkpoint"]), job["params"])
+        except Exception as e:
+            logger.error("Job %s failed:\n%s", job_id, traceback.format_exc())
+            self.store.update(job_id, status="failed", error=str(e))
+        else:
+            self.store.update(job_id, status="succeeded", result=result)
@@ -0,0 +1,420 @@
+# load_test.py
+"""
+Load generator for the Slides MCP server.
+
+Spawns serverv2.py against a stand-in backend (fake_backend by default),
+drives it over the real MCP transport with concurrent simulated agents
+running a mixed tool workload, and reports throughput, tail latency, server
+memory growth and Google API calls per tool call. Peak memory per request is
+measured separately by calling the same tools in-process under tracemalloc.
+
+Over stdio all agents share the one client session a stdio server accepts,
+with their calls in flight concurrently. Over SSE every agent opens its own
+session.
+
+The server paces writes to its real Slides write quota unless
+--writes-per-minute says otherwise, so write-heavy mixes show the latency
+tool calls pick up waiting for quota.
+
+Usage:
+    python load_test.py --transport stdio --agents 16 --calls 50
+    python load_test.py --transport sse --agents 32 --calls 100 --latency-ms 80 --json results.json
+
+Exits with status 1 if a --max-* threshold is exceeded, so it can gate CI.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from collections import defaultdict
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.sse import sse_client
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Tool name -> arguments for one call, given the agent's deck name and RNG
+WORKLOADS = {
+    "list_slides": lambda deck, rng: {"presentation_name": deck},
+    "get_presentation_metadata": lambda deck, rng: {"presentation_name": deck},
+    "add_blank_slide": lambda deck, rng: {"presentation_name": deck},
+    "insert_text": lambda deck, rng: {
+        "presentation_name": deck,
+        "text": f"**Load test** {rng.randrange(10 ** 6)}\nGenerated by load_test.py",
+        "slide_index": 0,
+    },
+    "insert_image": lambda deck, rng: {
+        "presentation_name": deck,
+        "image_url": "https://example.com/load-test.png",
+        "slide_index": 0,
+    },
+    "duplicate_slides": lambda deck, rng: {"presentation_name": deck, "start_index": 0, "end_index": 0},
+}
+
+# Tool name -> in-process call of the same operation, used to measure peak memory per request
+PROFILED_CALLS = {
+    "list_slides": lambda tools, slides, drive, pid: tools.list_slides(slides, pid),
+    "get_presentation_metadata": lambda tools, slides, drive, pid: tools.get_presentation_metadata(slides, drive, pid),
+    "add_blank_slide": lambda tools, slides, drive, pid: tools.add_blank_slide(slides, pid),
+    "insert_text": lambda tools, slides, drive, pid: tools.insert_text_on_slide(slides, pid, "**Load test**", 0),
+    "insert_image": lambda tools, slides, drive, pid: tools.insert_image_on_slide(
+        slides, pid, "https://example.com/load-test.png", 0),
+    "duplicate_slides": lambda tools, slides, drive, pid: tools.duplicate_slides(slides, pid, 0, 0),
+}
+
+DEFAULT_MIX = "list_slides=4,get_presentation_metadata=2,insert_text=2,insert_image=1,add_blank_slide=1"
+
+
+def parse_mix(mix: str) -> dict[str, int]:
+    weights = {}
+    for item in mix.split(","):
+        tool, _, weight = item.partition("=")
+        if tool not in WORKLOADS:
+            raise ValueError(f"Unknown tool in workload mix: {tool}. Use one of {sorted(WORKLOADS)}.")
+        weights[tool] = int(weight or 1)
+    return weights
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _load_stats(path: str) -> dict:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {"calls": {}, "total": 0}
+
+
+async def read_stats(path: str, timeout: float = 5) -> dict:
+    """
+    Returns the backend's stats as of now.
+
+    The backend rewrites the file periodically, so this waits for a copy
+    written after the call; a stale one would miss the latest API calls.
+    Backends that don't timestamp their stats are read as is.
+    """
+    requested = time.time()
+    deadline = time.monotonic() + timeout
+    stats = _load_stats(path)
+    while "written_at" in stats and stats["written_at"] <= requested and time.monotonic() < deadline:
+        await asyncio.sleep(0.02)
+        stats = _load_stats(path)
+    return stats
+
+
+def server_env(args, workdir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "SLIDES_MCP_BACKEND": args.backend,
+        "SLIDES_FAKE_SEED": f"decks={args.decks},slides={args.slides},images={args.images}",
+        "SLIDES_FAKE_LATENCY_MS": str(args.latency_ms),
+        "SLIDES_FAKE_STATS": os.path.join(workdir, "backend_stats.json"),
+        "SLIDES_JOBS_DB": os.path.join(workdir, "jobs.db"),
+        "SLIDES_EXPORT_DIR": os.path.join(workdir, "exports"),
+        "SLIDES_WRITES_PER_MINUTE": str(args.writes_per_minute),
+        "FASTMCP_LOG_LEVEL": "WARNING",
+    })
+    return env
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} before accepting connections.")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError(f"Server did not listen on port {port} within {timeout}s.")
+
+
+@asynccontextmanager
+async def open_sessions(args, env: dict):
+    """Starts the server and yields one client session per agent."""
+    async with AsyncExitStack() as stack:
+        if args.transport == "stdio":
+            params = StdioServerParameters(command=sys.executable, args=["serverv2.py", "stdio"], env=env, cwd=HERE)
+            read, write = await stack.enter_async_context(stdio_client(params))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            yield [session] * args.agents
+            return
+
+        port = _free_port()
+        process = subprocess.Popen(
+            [sys.executable, "serverv2.py", "sse"],
+            cwd=HERE,
+            env=dict(env, FASTMCP_HOST="127.0.0.1", FASTMCP_PORT=str(port))
+        )
+        stack.callback(process.wait, 10)
+        stack.callback(process.terminate)
+        await _wait_for_port(port, process)
+
+        sessions = []
+        for _ in range(args.agents):
+            read, write = await stack.enter_async_context(sse_client(f"http://127.0.0.1:{port}/sse"))
+            session = await stack.enter_async_context(ClientSession(read, write))
+            await session.initialize()
+            sessions.append(session)
+        yield sessions
+
+
+async def call_tool(session: ClientSession, tool: str, arguments: dict) -> tuple[bool, float, str]:
+    started = time.perf_counter()
+    try:
+        result = await session.call_tool(tool, arguments)
+        error = result.content[0].text if result.isError and result.content else None
+        ok = not result.isError
+    except Exception as e:
+        ok, error = False, str(e)
+    return ok, time.perf_counter() - started, error
+
+
+async def calibrate(session: ClientSession, tools: list[str], stats_path: str, calls: int, seed: int) -> dict:
+    """
+    Runs each tool alone to count the Google API calls one tool call costs.
+
+    A tool with failed calibration calls gets no figure, since a call that
+    errors out early would understate the cost; its errors are reported instead.
+    """
+    rng = random.Random(seed)
+    amplification = {}
+    for tool in tools:
+        before = await read_stats(stats_path)
+        errors = []
+        for _ in range(calls):
+            ok, _, error = await call_tool(session, tool, WORKLOADS[tool]("loadtest-0", rng))
+            if not ok:
+                errors.append(error)
+        after = await read_stats(stats_path)
+        if errors:
+            amplification[tool] = {"calibration_errors": len(errors), "calibration_error": errors[0]}
+            continue
+        by_method = {
+            method: round((count - before["calls"].get(method, 0)) / calls, 2)
+            for method, count in after["calls"].items()
+            if count != before["calls"].get(method, 0)
+        }
+        amplification[tool] = {"api_calls": round((after["total"] - before["total"]) / calls, 2), "by_method": by_method}
+    return amplification
+
+
+def profile_memory(args, tool_names: list[str]) -> dict:
+    """
+    Measures the peak Python heap allocated by one call of each tool against a seeded deck.
+
+    Runs in this process with the fake backend, which returns fresh copies of
+    the stored JSON like the real client, so response parsing is included.
+    """
+    import fake_backend
+    import tools
+
+    fake_backend.LATENCY_SECONDS = 0
+    tools.write_quota = tools.QuotaLimiter(10 ** 9)
+    fake_backend.seed(decks=1, slides=args.slides, images=args.images)
+    slides, drive = fake_backend.get_slides_service(), fake_backend.get_drive_service()
+    presentation_id = tools.find_presentation_id_by_name(drive, "loadtest-0")
+
+    profile = {}
+    tracemalloc.start()
+    try:
+        for tool in tool_names:
+            peaks = []
+            for _ in range(args.memory_calls):
+                tracemalloc.reset_peak()
+                baseline = tracemalloc.get_traced_memory()[0]
+                PROFILED_CALLS[tool](tools, slides, drive, presentation_id)
+                peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+            profile[tool] = {
+                "peak_kb": round(percentile(peaks, 50) / 1024, 1),
+                "peak_kb_max": round(max(peaks) / 1024, 1)
+            }
+    finally:
+        tracemalloc.stop()
+    return profile
+
+
+async def run_agents(args, sessions: list, weights: dict[str, int]) -> dict:
+    samples = defaultdict(list)
+    errors = defaultdict(list)
+    tools, tool_weights = list(weights), list(weights.values())
+
+    async def agent(n: int):
+        rng = random.Random(args.seed + n)
+        deck = f"loadtest-{n % args.decks}"
+        for _ in range(args.calls):
+            tool = rng.choices(tools, tool_weights)[0]
+            ok, seconds, error = await call_tool(sessions[n], tool, WORKLOADS[tool](deck, rng))
+            samples[tool].append(seconds)
+            if not ok:
+                errors[tool].append(error)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(agent(n) for n in range(args.agents)))
+    return {"wall_seconds": time.perf_counter() - started, "samples": samples, "errors": errors}
+
+
+def summarize(args, run: dict, amplification: dict, memory: dict, memory_profile: dict) -> dict:
+    all_samples = [seconds for samples in run["samples"].values() for seconds in samples]
+    total_errors = sum(len(errors) for errors in run["errors"].values())
+
+    def latency(samples: list[float]) -> dict:
+        stats = {f"p{p}_ms": round(percentile(samples, p) * 1000, 2) for p in (50, 95, 99)}
+        stats["max_ms"] = round(max(samples, default=0) * 1000, 2)
+        return stats
+
+    return {
+        "transport": args.transport,
+        "agents": args.agents,
+        "calls": len(all_samples),
+        "errors": total_errors,
+        "wall_seconds": round(run["wall_seconds"], 3),
+        "throughput_per_second": round(len(all_samples) / run["wall_seconds"], 2) if run["wall_seconds"] else 0,
+        "latency": latency(all_samples),
+        "tools": {
+            tool: {
+                "calls": len(samples),
+                "errors": len(run["errors"].get(tool, [])),
+                "first_error": next(iter(run["errors"].get(tool, [])), None),
+                **latency(samples),
+                **amplification.get(tool, {}),
+                **memory_profile.get(tool, {}),
+            }
+            for tool, samples in sorted(run["samples"].items())
+        },
+        "memory": memory,
+    }
+
+
+def print_report(summary: dict):
+    print(f"transport={summary['transport']} agents={summary['agents']} calls={summary['calls']} "
+          f"errors={summary['errors']} wall={summary['wall_seconds']}s "
+          f"throughput={summary['throughput_per_second']} calls/s")
+    latency = summary["latency"]
+    print(f"latency: p50={latency['p50_ms']}ms p95={latency['p95_ms']}ms "
+          f"p99={latency['p99_ms']}ms max={latency['max_ms']}ms")
+    print()
+    print(f"{'tool':<28}{'calls':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'api/call':>10}{'peak KB':>10}")
+    for tool, stats in summary["tools"].items():
+        print(f"{tool:<28}{stats['calls']:>7}{stats['errors']:>8}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats.get('api_calls', '-'):>10}"
+              f"{stats.get('peak_kb', '-'):>10}")
+        if stats["first_error"]:
+            print(f"    first error: {stats['first_error'][:200]}")
+        if stats.get("calibration_errors"):
+            print(f"    calibration failed {stats['calibration_errors']} time(s), no api/call figure: "
+                  f"{(stats['calibration_error'] or '')[:200]}")
+    memory = summary["memory"]
+    if memory:
+        print()
+        print(f"server rss: start={memory.get('start_mb')}MB end={memory.get('end_mb')}MB "
+              f"growth={memory.get('growth_mb')}MB peak={memory.get('peak_mb')}MB")
+
+
+def check_thresholds(args, summary: dict) -> list[str]:
+    failures = []
+    if args.max_p99_ms is not None and summary["latency"]["p99_ms"] > args.max_p99_ms:
+        failures.append(f"p99 latency {summary['latency']['p99_ms']}ms exceeds {args.max_p99_ms}ms")
+    growth = summary["memory"].get("growth_mb")
+    if args.max_rss_growth_mb is not None and growth is not None and growth > args.max_rss_growth_mb:
+        failures.append(f"RSS growth {growth}MB exceeds {args.max_rss_growth_mb}MB")
+    if args.max_error_rate is not None and summary["calls"]:
+        rate = summary["errors"] / summary["calls"]
+        if rate > args.max_error_rate:
+            failures.append(f"error rate {rate:.2%} exceeds {args.max_error_rate:.2%}")
+    return failures
+
+
+def _mb(kb) -> float:
+    return round(kb / 1024, 1) if kb is not None else None
+
+
+async def main(args) -> int:
+    weights = parse_mix(args.mix)
+    with tempfile.TemporaryDirectory(prefix="slides-load-") as workdir:
+        env = server_env(args, workdir)
+        stats_path = env["SLIDES_FAKE_STATS"]
+        async with open_sessions(args, env) as sessions:
+            amplification = {}
+            if args.calibration_calls:
+                amplification = await calibrate(sessions[0], list(weights), stats_path,
+                                                args.calibration_calls, args.seed)
+            start = await read_stats(stats_path)
+            run = await run_agents(args, sessions, weights)
+            end = await read_stats(stats_path)
+
+    memory = {}
+    if "rss_kb" in start or "rss_kb" in end:
+        memory = {
+            "start_mb": _mb(start.get("rss_kb")),
+            "end_mb": _mb(end.get("rss_kb")),
+            "peak_mb": _mb(end.get("peak_rss_kb")),
+        }
+        if start.get("rss_kb") and end.get("rss_kb"):
+            memory["growth_mb"] = _mb(end["rss_kb"] - start["rss_kb"])
+
+    memory_profile = profile_memory(args, list(weights)) if args.memory_calls else {}
+    summary = summarize(args, run, amplification, memory, memory_profile)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as fh:
+            json.dump(summary, fh, indent=2)
+
+    failures = check_thresholds(args, summary)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Slides MCP server over a real MCP transport.")
+    parser.add_argument("--transport", choices=("stdio", "sse"), default="stdio")
+    parser.add_argument("--agents", type=int, default=8, help="concurrent simulated agents")
+    parser.add_argument("--calls", type=int, default=25, help="tool calls per agent")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted tool mix, e.g. 'list_slides=3,insert_text=1'")
+    parser.add_argument("--backend", default="fake_backend", help="module providing the stand-in Google services")
+    parser.add_argument("--decks", type=int, default=4, help="decks seeded in the fake backend")
+    parser.add_argument("--slides", type=int, default=20, help="slides per seeded deck")
+    parser.add_argument("--images", type=int, default=2, help="images per seeded slide")
+    parser.add_argument("--latency-ms", type=float, default=50, help="simulated Google API round trip")
+    parser.add_argument("--writes-per-minute", type=int, default=int(os.getenv("SLIDES_WRITES_PER_MINUTE", "60")),
+                        help="Slides write quota the server paces to (default: the server's own setting); "
+                             "raise it to measure the server without the quota")
+    parser.add_argument("--calibration-calls", type=int, default=3,
+                        help="sequential calls per tool used to measure API-call amplification (0 to skip)")
+    parser.add_argument("--memory-calls", type=int, default=5,
+                        help="in-process calls per tool used to measure peak memory per request (0 to skip)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--max-p99-ms", type=float)
+    parser.add_argument("--max-rss-growth-mb", type=float)
+    parser.add_argument("--max-error-rate", type=float)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
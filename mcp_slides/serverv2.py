@@ -1,11 +1,29 @@
+import functools
+import anyio
 from mcp.server.fastmcp import FastMCP
 from typing import Optional
 import tools
+import jobs
 from auth import get_slides_service, get_drive_service
 
 mcp = FastMCP("Google Slides MCP (Token Auth)")
 
+
+def in_worker_thread(func):
+    """
+    Runs a blocking tool in a worker thread.
+
+    FastMCP calls sync tools on the event loop, so without this a tool waiting
+    on Google, the write quota or a retry backoff would stall every session.
+    """
+    @functools.wraps(func)
+    async def run(*args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(func, *args, **kwargs))
+    return run
+
+
 @mcp.tool()
+@in_worker_thread
 def create_presentation(title: str) -> str:
     """
     Creates a new Google Slides presentation with the given title.
@@ -24,6 +42,7 @@ def create_presentation(title: str) -> str:
     return tools.create_presentation(slides_service, drive_service, title)
 
 @mcp.tool()
+@in_worker_thread
 def get_presentation_metadata(
     presentation_id: Optional[str] = None,
     presentation_name: Optional[str] = None
@@ -55,9 +74,11 @@ def get_presentation_metadata(
     return tools.get_presentation_metadata(slides_service, drive_service, presentation_id)
 
 @mcp.tool()
+@in_worker_thread
 def add_blank_slide(
     presentation_id: Optional[str] = None,
-    presentation_name: Optional[str] = None
+    presentation_name: Optional[str] = None,
+    idempotency_key: Optional[str] = None
 ) -> str:
     """
     Adds a blank slide to a Google Slides presentation.
@@ -65,19 +86,22 @@ def add_blank_slide(
     Inputs:
     - presentation_id (str, optional): ID of the target presentation.
     - presentation_name (str, optional): Name of the target presentation.
+    - idempotency_key (str, optional): Key that makes retries of this call safe.
 
     Returns:
     - str: ID of the newly added blank slide.
 
     Notes:
     - If both ID and name are provided, ID is prioritized.
+    - Repeating a call with the same idempotency_key returns the existing slide instead of adding another.
     """
     drive_service = get_drive_service()
     slides_service = get_slides_service()
     presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
-    return tools.add_blank_slide(slides_service, presentation_id)
+    return tools.add_blank_slide(slides_service, presentation_id, idempotency_key)
 
 @mcp.tool()
+@in_worker_thread
 def insert_text(
     text: str,
     slide_index: int = -1,
@@ -86,8 +110,10 @@ def insert_text(
     color: str = "#000000",
     align: str = "center",
     bullet: bool = False,
+    layout: str = "body",
     presentation_id: Optional[str] = None,
-    presentation_name: Optional[str] = None
+    presentation_name: Optional[str] = None,
+    idempotency_key: Optional[str] = None
 ) -> str:
     """
     Inserts styled text into a slide of a Google Slides presentation.
@@ -100,10 +126,15 @@ def insert_text(
     - color (str): Text color in hex format.
     - align (str): Text alignment ('left', 'center', 'right').
     - bullet (bool): Whether to add bullet points.
+    - layout (str): Text box placement preset ('body', 'title', 'subtitle', 'full_width', 'footer').
     - presentation_id / presentation_name (optional): Identify target presentation.
+    - idempotency_key (str, optional): Key that makes retries of this call safe.
 
     Returns:
     - str: ID of the inserted text box object.
+
+    Notes:
+    - Repeating a call with the same idempotency_key returns the existing text box instead of inserting another.
     """
     drive_service = get_drive_service()
     slides_service = get_slides_service()
@@ -117,10 +148,13 @@ def insert_text(
         font_size,
         color,
         align,
-        bullet
+        bullet,
+        layout,
+        idempotency_key
     )
 
 @mcp.tool()
+@in_worker_thread
 def insert_image(
     image_url: str,
     slide_index: int = -1,
@@ -129,7 +163,8 @@ def insert_image(
     x_offset: int = 50,
     y_offset: int = 100,
     presentation_id: Optional[str] = None,
-    presentation_name: Optional[str] = None
+    presentation_name: Optional[str] = None,
+    idempotency_key: Optional[str] = None
 ) -> str:
     """
     Inserts an image into a slide.
@@ -140,32 +175,374 @@ def insert_image(
     - width / height (int): Image size.
     - x_offset / y_offset (int): Position in slide.
     - presentation_id / presentation_name (optional): Presentation to target.
+    - idempotency_key (str, optional): Key that makes retries of this call safe.
 
     Returns:
     - str: Object ID of the inserted image.
+
+    Notes:
+    - Repeating a call with the same idempotency_key returns the existing image instead of inserting another.
     """
     drive_service = get_drive_service()
     slides_service = get_slides_service()
     presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
-    return tools.insert_image_on_slide(slides_service, presentation_id, image_url, slide_index, width, height, x_offset, y_offset)
+    return tools.insert_image_on_slide(slides_service, presentation_id, image_url, slide_index, width, height, x_offset, y_offset, idempotency_key)
 
 @mcp.tool()
+@in_worker_thread
 def list_slides(
+    offset: int = 0,
+    max_chars: Optional[int] = None,
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> dict:
+    """
+    Lists the slides in a presentation with their text.
+
+    Inputs:
+    - offset (int): Index of the first slide to return, zero or greater (use next_offset from a truncated response).
+    - max_chars (int, optional): Size limit of the returned slide list in characters, at least 1
+      (default and maximum: server limit).
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - dict: slides (index, objectId, notesPageId, texts), plus total, offset, returned,
+      truncated and next_offset.
+
+    Notes:
+    - Large presentations are returned in pages; call again with next_offset while truncated is true.
+    """
+    if max_chars is not None and max_chars < 1:
+        raise ValueError("max_chars must be at least 1.")
+    if offset < 0:
+        raise ValueError("offset must be zero or greater.")
+    limit = tools.MAX_RESPONSE_CHARS if max_chars is None else min(max_chars, tools.MAX_RESPONSE_CHARS)
+
+    drive_service = get_drive_service()
+    slides_service = get_slides_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    return tools.list_slides(slides_service, presentation_id, offset, limit)
+
+@mcp.tool()
+@in_worker_thread
+def export_presentation(
+    export_format: str = "pdf",
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> dict:
+    """
+    Exports a presentation to a PDF or PPTX file on the server.
+
+    Inputs:
+    - export_format (str): Output format ('pdf' or 'pptx').
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - dict: Path of the exported file, the revision it was rendered from, and whether it was cached.
+
+    Notes:
+    - Exports are cached by revision, so unchanged presentations are not exported again.
+    """
+    drive_service = get_drive_service()
+    slides_service = get_slides_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    return tools.export_presentation(slides_service, drive_service, presentation_id, export_format)
+
+@mcp.tool()
+@in_worker_thread
+def export_slide_thumbnails(
+    size: str = "LARGE",
+    max_workers: int = 4,
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> dict:
+    """
+    Renders every slide of a presentation to a PNG thumbnail on the server.
+
+    Inputs:
+    - size (str): Thumbnail size ('SMALL', 'MEDIUM', 'LARGE').
+    - max_workers (int): Number of slides rendered concurrently.
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - dict: Revision ID, list of thumbnail paths in slide order, and how many were cached.
+
+    Notes:
+    - Thumbnails are cached by revision, so only slides of changed presentations are rendered again.
+    """
+    drive_service = get_drive_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    return tools.export_slide_thumbnails(get_slides_service, presentation_id, size, max_workers)
+
+@mcp.tool()
+@in_worker_thread
+def reorder_slides(
+    slide_order: list[str],
     presentation_id: Optional[str] = None,
     presentation_name: Optional[str] = None
-) -> list:
+) -> str:
     """
-    Lists all slides in a presentation.
+    Rearranges all slides of a presentation into a new order in one atomic update.
 
     Inputs:
+    - slide_order (list[str]): Object IDs of every slide, in the desired order.
     - presentation_id / presentation_name (optional): Presentation to target.
 
     Returns:
-    - list: A list of dictionaries with slide details (index, objectId, etc.)
+    - str: Confirmation message with the number of moves applied.
+
+    Notes:
+    - Only slides that are out of place are moved.
+    """
+    drive_service = get_drive_service()
+    slides_service = get_slides_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    return tools.reorder_slides(slides_service, presentation_id, slide_order)
+
+@mcp.tool()
+@in_worker_thread
+def delete_slides(
+    slide_object_ids: list[str],
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> str:
+    """
+    Deletes several slides in one atomic update.
+
+    Inputs:
+    - slide_object_ids (list[str]): Object IDs of the slides to delete.
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - str: Confirmation message.
+
+    Notes:
+    - Nothing is deleted if any of the slides does not exist.
     """
     drive_service = get_drive_service()
     slides_service = get_slides_service()
     presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
-    return tools.list_slides(slides_service, presentation_id)
+    return tools.delete_slides(slides_service, presentation_id, slide_object_ids)
+
+@mcp.tool()
+@in_worker_thread
+def duplicate_slides(
+    start_index: int,
+    end_index: int,
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None,
+    idempotency_key: Optional[str] = None
+) -> dict:
+    """
+    Duplicates a range of slides in one atomic update.
+
+    Inputs:
+    - start_index / end_index (int): First and last slide of the range (0-based, inclusive).
+    - presentation_id / presentation_name (optional): Presentation to target.
+    - idempotency_key (str, optional): Key that makes retries of this call safe.
+
+    Returns:
+    - dict: Mapping of original object IDs (slides and their elements) to the IDs of the copies.
+
+    Notes:
+    - The copies are inserted directly after the original range, in the same order.
+    - Repeating a call with the same idempotency_key does not duplicate the range again.
+    """
+    drive_service = get_drive_service()
+    slides_service = get_slides_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    return tools.duplicate_slides(slides_service, presentation_id, start_index, end_index, idempotency_key)
+
+# Background jobs
+#
+# Long-running operations are submitted to a worker pool and return a job ID
+# right away; progress and partial results are polled with `job_status`.
+# Several server processes can share the jobs database; each job runs in the
+# process that holds its lease and is taken over only if that process stops.
+job_queue = jobs.JobQueue(jobs.JobStore())
+
+@job_queue.handler("build_deck")
+def _build_deck_job(job: jobs.Job, params: dict) -> dict:
+    slides_service = get_slides_service()
+    slide_ids = tools.build_deck(
+        slides_service,
+        params["presentation_id"],
+        params["slides"],
+        job.id,
+        start=job.checkpoint,
+        on_commit=job.commit,
+        background=True
+    )
+    return {"presentation_id": params["presentation_id"], "slide_ids": slide_ids}
+
+@job_queue.handler("share_presentation")
+def _share_presentation_job(job: jobs.Job, params: dict) -> str:
+    drive_service = get_drive_service()
+    emails = params["emails"]
+    for email in emails[job.checkpoint:]:
+        tools.share_presentation(drive_service, params["presentation_id"], [email], params["role"])
+        job.commit(email)
+    return f"Presentation shared with: {', '.join(emails)} as '{params['role']}'"
+
+@job_queue.handler("fan_out")
+def _fan_out_job(job: jobs.Job, params: dict) -> dict:
+    done = {result["presentation_id"] for result in job.results()}
+    pending = [pid for pid in params["presentation_ids"] if pid not in done]
+
+    # Decks an earlier run started writing to but never reported on. Without
+    # created slide IDs to look for, replaying their edits could apply them twice.
+    if not tools.operations_create_objects(params["operations"]):
+        interrupted = job.marked()
+        for pid in [pid for pid in pending if pid in interrupted]:
+            job.report({
+                "presentation_id": pid,
+                "status": "unknown",
+                "error": "Interrupted while updating; the edits may or may not have been applied and were not retried."
+            })
+        pending = [pid for pid in pending if pid not in interrupted]
+
+    for result in tools.fan_out(get_slides_service, pending, params["operations"], job.id, params["max_workers"],
+                                on_start=job.mark):
+        job.report(result)
+
+    results = job.results()
+    counts = {status: sum(1 for result in results if result["status"] == status)
+              for status in ("succeeded", "failed", "unknown")}
+    return {"total": len(results), **counts}
+
+@mcp.tool()
+@in_worker_thread
+def submit_deck_build(
+    slides: list[dict],
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> dict:
+    """
+    Starts appending many slides to a presentation in the background.
+
+    Inputs:
+    - slides (list[dict]): One spec per slide, e.g.
+      {"texts": [{"text": "**Title**", "layout": "title", "font_size": 32}],
+       "images": [{"image_url": "https://...", "x_offset": 400}]}.
+      Text entries accept the same options as insert_text; image entries the same as insert_image.
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - dict: The job ID to poll with job_status.
+
+    Notes:
+    - Malformed slide specs are rejected before a job is created.
+    - Each slide is committed separately; partial results list the IDs of the slides created so far.
+    - An interrupted build resumes after the last committed slide when the server restarts.
+    """
+    tools.validate_slide_specs(slides)
+    drive_service = get_drive_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    job_id = job_queue.submit(
+        "build_deck",
+        {"presentation_id": presentation_id, "slides": slides},
+        total=len(slides)
+    )
+    return {"job_id": job_id}
+
+@mcp.tool()
+@in_worker_thread
+def submit_share_presentation(
+    emails: list[str],
+    role: str = "writer",
+    presentation_id: Optional[str] = None,
+    presentation_name: Optional[str] = None
+) -> dict:
+    """
+    Starts sharing a presentation with many email addresses in the background.
+
+    Inputs:
+    - emails (list[str]): Email addresses to share the presentation with.
+    - role (str): Sharing role – "reader", "writer", or "commenter".
+    - presentation_id / presentation_name (optional): Presentation to target.
+
+    Returns:
+    - dict: The job ID to poll with job_status.
+
+    Notes:
+    - Partial results list the addresses shared with so far.
+    """
+    drive_service = get_drive_service()
+    presentation_id = tools.resolve_presentation_id(drive_service, presentation_id, presentation_name)
+    job_id = job_queue.submit(
+        "share_presentation",
+        {"presentation_id": presentation_id, "emails": emails, "role": role},
+        total=len(emails)
+    )
+    return {"job_id": job_id}
+
+@mcp.tool()
+@in_worker_thread
+def submit_batch_operations(
+    operations: list[dict],
+    presentation_ids: Optional[list[str]] = None,
+    drive_query: Optional[str] = None,
+    max_workers: int = 8
+) -> dict:
+    """
+    Starts applying the same edits to many presentations in the background.
+
+    Inputs:
+    - operations (list[dict]): Edits applied to every presentation, in order. Supported:
+      {"type": "replace_all_text", "find_text": "Old Co", "replace_text": "New Co", "match_case": true}
+      {"type": "add_slide", "texts": [...], "images": [...], "insertion_index": 0}
+      (add_slide takes the same slide spec as submit_deck_build).
+    - presentation_ids (list[str], optional): Presentations to edit.
+    - drive_query (str, optional): Drive search query selecting presentations, e.g. "name contains 'Q3'".
+    - max_workers (int): Number of presentations edited concurrently.
+
+    Returns:
+    - dict: The job ID to poll with job_status, and the number of presentations selected.
+
+    Notes:
+    - Each presentation is updated in one atomic request; a failure on one does not affect the others.
+    - Partial results report status ("succeeded", "failed" or "unknown") and timing per presentation,
+      in completion order. "unknown" means a replace-only update timed out or was interrupted and may
+      or may not have been applied; it is not retried, to avoid replacing text twice.
+    - Writes from all workers share the server's Slides write quota.
+    """
+    if not presentation_ids and not drive_query:
+        raise ValueError("Either 'presentation_ids' or 'drive_query' must be provided.")
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+    tools.validate_operations(operations)
+
+    targets = list(presentation_ids or [])
+    if drive_query:
+        targets.extend(tools.find_presentation_ids(get_drive_service(), drive_query))
+    targets = list(dict.fromkeys(targets))
+
+    job_id = job_queue.submit(
+        "fan_out",
+        {"presentation_ids": targets, "operations": operations, "max_workers": max_workers},
+        total=len(targets)
+    )
+    return {"job_id": job_id, "presentation_count": len(targets)}
+
+@mcp.tool()
+@in_worker_thread
+def job_status(job_id: str, since: int = 0) -> dict:
+    """
+    Reports the progress of a background job.
+
+    Inputs:
+    - job_id (str): ID returned when the job was submitted.
+    - since (int): Only return partial results from this position on (use next_since from the previous poll).
+
+    Returns:
+    - dict: status ('queued', 'running', 'succeeded', 'failed'), progress, total, partial_results,
+      next_since, and the final result or error once finished.
+    """
+    return job_queue.status(job_id, since)
 
+job_queue.resume()
 
+if __name__ == "__main__":
+    # python serverv2.py [stdio|sse]
+    import sys
+    mcp.run(transport=sys.argv[1] if len(sys.argv) > 1 else "stdio")
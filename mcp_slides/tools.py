@@ -35,7 +35,7 @@ def create_presentation(service, drive_service, title: str) -> str:
 
 
 
-from typing import Any
+from typing import Any, Optional
 
 def find_presentation_id_by_name(drive_service: Any, name: str) -> str:
     """
@@ -53,31 +53,40 @@ def find_presentation_id_by_name(drive_service: Any, name: str) -> str:
         raise ValueError(f"No presentation found with name: {name}")
     return files[0]["id"]
 
-def add_blank_slide(service, presentation_id: str) -> str:
+def add_blank_slide(service, presentation_id: str, idempotency_key: Optional[str] = None) -> str:
     """
     Adds a blank slide to a presentation using its ID.
+
+    Passing the same idempotency_key again returns the slide created the first
+    time instead of adding another one.
     """
+    slide_id = make_object_id("slide", idempotency_key or new_idempotency_key())
     requests = [
         {
             "createSlide": {
+                "objectId": slide_id,
                 "slideLayoutReference": {
                     "predefinedLayout": "BLANK"
                 }
             }
         }
     ]
-    response = service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body={"requests": requests}
-    ).execute()
+    execute_batch_update(service, presentation_id, requests, [slide_id], check_existing=bool(idempotency_key))
 
-    return response.get("replies", [])[0]["createSlide"]["objectId"]
+    return slide_id
 
 # tools.py
 import os
 import re
+import json
+from functools import lru_cache
 
+Request = dict[str, Any]
+
+@lru_cache(maxsize=256)
 def hex_to_rgb(hex_color: str):
+    if not re.fullmatch(r"#?[0-9a-fA-F]{6}", hex_color):
+        raise ValueError(f"Invalid hex color: {hex_color}. Use the form '#RRGGBB'.")
     hex_color = hex_color.lstrip("#")
     return tuple(int(hex_color[i:i+2], 16) / 255.0 for i in (0, 2, 4))
 
@@ -100,113 +109,183 @@ def parse_bold_spans(text: str):
             i += 1
     return clean_text, spans
 
-def insert_text_on_slide(service, presentation_id: str, text: str, slide_index: int = -1,
-                         font_family: str = "Arial", font_size: int = 18, color: str = "#000000",
-                         align: str = "center", bullet: bool = False) -> str:
-    rgb = hex_to_rgb(color)
-    presentation = service.presentations().get(presentationId=presentation_id).execute()
-    slides = presentation.get("slides", [])
-    if not slides:
-        raise ValueError("The presentation has no slides.")
-    slide_id = slides[slide_index]["objectId"]
 
-    text_box_id = f"textbox_{int(os.urandom(2).hex(), 16)}"
-    plain_text, bold_spans = parse_bold_spans(text)
+# Request builders
+#
+# Every builder returns fresh dicts, so callers may adjust a built request in
+# place. Only color parsing is cached, and it yields immutable tuples.
+# Fields that equal the API default (zero offsets, zero color channels) are
+# left out to keep batchUpdate bodies small.
 
-    requests = [
-        {
-            "createShape": {
-                "objectId": text_box_id,
-                "shapeType": "TEXT_BOX",
-                "elementProperties": {
-                    "pageObjectId": slide_id,
-                    "size": {
-                        "height": {"magnitude": 100, "unit": "PT"},
-                        "width": {"magnitude": 400, "unit": "PT"}
-                    },
-                    "transform": {
-                        "scaleX": 1,
-                        "scaleY": 1,
-                        "translateX": 50,
-                        "translateY": 100,
-                        "unit": "PT"
-                    }
-                }
-            }
-        },
-        {
-            "insertText": {
-                "objectId": text_box_id,
-                "insertionIndex": 0,
-                "text": plain_text
-            }
-        },
-        {
-            "updateTextStyle": {
-                "objectId": text_box_id,
-                "style": {
-                    "fontFamily": font_family,
-                    "fontSize": {
-                        "magnitude": font_size,
-                        "unit": "PT"
-                    },
-                    "foregroundColor": {
-                        "opaqueColor": {
-                            "rgbColor": {
-                                "red": rgb[0],
-                                "green": rgb[1],
-                                "blue": rgb[2]
-                            }
-                        }
-                    }
-                },
-                "textRange": {
-                    "type": "ALL"
-                },
-                "fields": "fontFamily,fontSize,foregroundColor"
-            }
-        },
-        {
-            "updateParagraphStyle": {
-                "objectId": text_box_id,
-                "style": {
-                    "alignment": align.upper()
-                },
-                "textRange": {
-                    "type": "ALL"
-                },
-                "fields": "alignment"
-            }
+# Named text box geometry on a standard 720x405 PT slide: (width, height, x, y)
+LAYOUT_PRESETS = {
+    "body": (400, 100, 50, 100),
+    "title": (620, 60, 50, 30),
+    "subtitle": (620, 40, 50, 95),
+    "full_width": (620, 250, 50, 110),
+    "footer": (620, 30, 50, 360),
+}
+
+def all_text() -> Request:
+    return {"type": "ALL"}
+
+
+def rgb_color(hex_color: str) -> Request:
+    """Returns an OptionalColor fragment for a hex color, omitting zero channels."""
+    red, green, blue = hex_to_rgb(hex_color)
+    channels = {"red": red, "green": green, "blue": blue}
+    return {"opaqueColor": {"rgbColor": {k: v for k, v in channels.items() if v}}}
+
+
+def size_fragment(width: float, height: float) -> Request:
+    return {
+        "height": {"magnitude": height, "unit": "PT"},
+        "width": {"magnitude": width, "unit": "PT"}
+    }
+
+
+def transform_fragment(x: float, y: float) -> Request:
+    transform = {"scaleX": 1, "scaleY": 1, "unit": "PT"}
+    if x:
+        transform["translateX"] = x
+    if y:
+        transform["translateY"] = y
+    return transform
+
+
+def layout_geometry(layout: str) -> tuple:
+    if layout not in LAYOUT_PRESETS:
+        raise ValueError(f"Unknown layout preset: {layout}. Use one of {sorted(LAYOUT_PRESETS)}.")
+    return LAYOUT_PRESETS[layout]
+
+
+def element_properties(page_id: str, width: float, height: float, x: float, y: float) -> Request:
+    return {
+        "pageObjectId": page_id,
+        "size": size_fragment(width, height),
+        "transform": transform_fragment(x, y)
+    }
+
+
+def fixed_range(start: int, end: int) -> Request:
+    return {"type": "FIXED_RANGE", "startIndex": start, "endIndex": end}
+
+
+def create_text_box_request(object_id: str, page_id: str, layout: str = "body") -> Request:
+    return {
+        "createShape": {
+            "objectId": object_id,
+            "shapeType": "TEXT_BOX",
+            "elementProperties": element_properties(page_id, *layout_geometry(layout))
         }
-    ]
+    }
 
-    for start, end in bold_spans:
-        requests.append({
-            "updateTextStyle": {
-                "objectId": text_box_id,
-                "style": {"bold": True},
-                "textRange": {
-                    "type": "FIXED_RANGE",
-                    "startIndex": start,
-                    "endIndex": end
-                },
-                "fields": "bold"
-            }
-        })
 
-    if bullet:
-        requests.append({
-            "createParagraphBullets": {
-                "objectId": text_box_id,
-                "textRange": {"type": "ALL"},
-                "bulletPreset": "BULLET_DISC_CIRCLE_SQUARE"
-            }
-        })
+def insert_text_request(object_id: str, text: str, index: int = 0) -> Request:
+    return {"insertText": {"objectId": object_id, "insertionIndex": index, "text": text}}
+
+
+def text_style_request(object_id: str, text_range: Optional[Request] = None, font_family: Optional[str] = None,
+                       font_size: Optional[float] = None, color: Optional[str] = None,
+                       bold: Optional[bool] = None) -> Request:
+    """
+    Builds an updateTextStyle request that only carries, and only masks, the given properties.
+    """
+    style = {}
+    if font_family is not None:
+        style["fontFamily"] = font_family
+    if font_size is not None:
+        style["fontSize"] = {"magnitude": font_size, "unit": "PT"}
+    if color is not None:
+        style["foregroundColor"] = rgb_color(color)
+    if bold is not None:
+        style["bold"] = bold
+    if not style:
+        raise ValueError("At least one text style property must be set.")
+    return {
+        "updateTextStyle": {
+            "objectId": object_id,
+            "style": style,
+            "textRange": text_range or all_text(),
+            "fields": ",".join(style)
+        }
+    }
+
+
+def paragraph_style_request(object_id: str, alignment: str, text_range: Optional[Request] = None) -> Request:
+    return {
+        "updateParagraphStyle": {
+            "objectId": object_id,
+            "style": {"alignment": alignment.upper()},
+            "textRange": text_range or all_text(),
+            "fields": "alignment"
+        }
+    }
+
 
-    service.presentations().batchUpdate(
+def bullets_request(object_id: str, preset: str = "BULLET_DISC_CIRCLE_SQUARE",
+                    text_range: Optional[Request] = None) -> Request:
+    return {
+        "createParagraphBullets": {
+            "objectId": object_id,
+            "textRange": text_range or all_text(),
+            "bulletPreset": preset
+        }
+    }
+
+
+def create_image_request(object_id: str, page_id: str, image_url: str, width: float, height: float,
+                         x: float, y: float) -> Request:
+    return {
+        "createImage": {
+            "objectId": object_id,
+            "url": image_url,
+            "elementProperties": element_properties(page_id, width, height, x, y)
+        }
+    }
+
+
+def text_box_requests(object_id: str, page_id: str, text: str, font_family: Optional[str] = "Arial",
+                      font_size: Optional[float] = 18, color: Optional[str] = "#000000",
+                      align: Optional[str] = "center", bullet: bool = False, layout: str = "body") -> list[Request]:
+    """
+    Builds the requests that create a styled text box. `**bold**` markers in `text` are honored.
+    """
+    plain_text, bold_spans = parse_bold_spans(text)
+    requests = [
+        create_text_box_request(object_id, page_id, layout),
+        insert_text_request(object_id, plain_text)
+    ]
+    if plain_text and (font_family, font_size, color) != (None, None, None):
+        requests.append(text_style_request(object_id, font_family=font_family, font_size=font_size, color=color))
+    if plain_text and align:
+        requests.append(paragraph_style_request(object_id, align))
+    requests.extend(
+        text_style_request(object_id, fixed_range(start, end), bold=True)
+        for start, end in bold_spans if end > start
+    )
+    if plain_text and bullet:
+        requests.append(bullets_request(object_id))
+    return requests
+
+
+def insert_text_on_slide(service, presentation_id: str, text: str, slide_index: int = -1,
+                         font_family: str = "Arial", font_size: int = 18, color: str = "#000000",
+                         align: str = "center", bullet: bool = False, layout: str = "body",
+                         idempotency_key: Optional[str] = None) -> str:
+    presentation = service.presentations().get(
         presentationId=presentation_id,
-        body={"requests": requests}
+        fields="slides.objectId"
     ).execute()
+    slides = presentation.get("slides", [])
+    if not slides:
+        raise ValueError("The presentation has no slides.")
+    slide_id = slides[slide_index]["objectId"]
+
+    text_box_id = make_object_id("textbox", idempotency_key or new_idempotency_key())
+    requests = text_box_requests(text_box_id, slide_id, text, font_family, font_size, color, align, bullet, layout)
+
+    execute_batch_update(service, presentation_id, requests, [text_box_id], check_existing=bool(idempotency_key))
 
     return text_box_id
 
@@ -217,7 +296,10 @@ from typing import Optional
 
 # Tool 2: Get presentation metadata
 def get_presentation_metadata(service, drive_service, presentation_id: str) -> dict:
-    presentation = service.presentations().get(presentationId=presentation_id).execute()
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides.objectId"
+    ).execute()
     file = drive_service.files().get(
         fileId=presentation_id,
         fields="id, name, createdTime, modifiedTime"
@@ -233,73 +315,95 @@ def get_presentation_metadata(service, drive_service, presentation_id: str) -> d
 
 # Tool 3: Insert image from URL into a slide
 def insert_image_on_slide(service, presentation_id: str, image_url: str, slide_index: int = -1,
-                           width: int = 300, height: int = 200, x_offset: int = 50, y_offset: int = 100) -> str:
-    presentation = service.presentations().get(presentationId=presentation_id).execute()
+                           width: int = 300, height: int = 200, x_offset: int = 50, y_offset: int = 100,
+                           idempotency_key: Optional[str] = None) -> str:
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides.objectId"
+    ).execute()
     slides = presentation.get("slides", [])
     if not slides:
         raise ValueError("No slides available to insert the image.")
     slide_id = slides[slide_index]["objectId"]
-    image_id = f"image_{uuid.uuid4().hex[:8]}"
+    image_id = make_object_id("image", idempotency_key or new_idempotency_key())
 
-    requests = [
-        {
-            "createImage": {
-                "objectId": image_id,
-                "url": image_url,
-                "elementProperties": {
-                    "pageObjectId": slide_id,
-                    "size": {
-                        "height": {"magnitude": height, "unit": "PT"},
-                        "width": {"magnitude": width, "unit": "PT"}
-                    },
-                    "transform": {
-                        "scaleX": 1,
-                        "scaleY": 1,
-                        "translateX": x_offset,
-                        "translateY": y_offset,
-                        "unit": "PT"
-                    }
-                }
-            }
-        }
-    ]
+    requests = [create_image_request(image_id, slide_id, image_url, width, height, x_offset, y_offset)]
 
-    service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body={"requests": requests}
-    ).execute()
+    execute_batch_update(service, presentation_id, requests, [image_id], check_existing=bool(idempotency_key))
     return image_id
 
 # Tool 4: List slides
-def list_slides(service, presentation_id: str) -> list:
-    presentation = service.presentations().get(presentationId=presentation_id).execute()
-    slides = presentation.get("slides", [])
 
-    slide_data = []
+# Upper bound on the JSON size of a list_slides response sent back to the agent
+MAX_RESPONSE_CHARS = int(os.getenv("SLIDES_MAX_RESPONSE_CHARS", "50000"))
 
-    for i, slide in enumerate(slides):
-        slide_info = {
-            "index": i,
-            "objectId": slide.get("objectId"),
-            "notesPageId": slide.get("notesPage", {}).get("objectId"),
-            "texts": []
-        }
+# Only the parts of each slide that list_slides reports are requested from the API
+LIST_SLIDES_FIELDS = "slides(objectId,notesPage.objectId,pageElements(shape.text.textElements.textRun.content))"
 
-        # Extract all text from shapes
-        for element in slide.get("pageElements", []):
-            shape = element.get("shape")
-            if shape:
-                text_elements = shape.get("text", {}).get("textElements", [])
-                for text_element in text_elements:
-                    text_run = text_element.get("textRun")
-                    if text_run:
-                        content = text_run.get("content", "").strip()
-                        if content:
-                            slide_info["texts"].append(content)
 
-        slide_data.append(slide_info)
+def slide_summary(index: int, slide: dict) -> dict:
+    """Returns the index, IDs and text of a slide fetched with LIST_SLIDES_FIELDS."""
+    texts = []
+    # Extract all text from shapes
+    for element in slide.get("pageElements", []):
+        for text_element in element.get("shape", {}).get("text", {}).get("textElements", []):
+            content = text_element.get("textRun", {}).get("content", "").strip()
+            if content:
+                texts.append(content)
+    return {
+        "index": index,
+        "objectId": slide.get("objectId"),
+        "notesPageId": slide.get("notesPage", {}).get("objectId"),
+        "texts": texts
+    }
 
-    return slide_data
+
+def shape_response(items: list, key: str, offset: int = 0, max_chars: int = MAX_RESPONSE_CHARS,
+                   serialize=lambda index, item: item) -> dict:
+    """
+    Returns serialized items from `offset` on, stopping before the JSON output would exceed `max_chars`.
+
+    `serialize(index, item)` runs only for the items considered, so the cost of
+    a page does not depend on how many items precede or follow it. At least one
+    item is returned so paging always makes progress. The metadata tells the
+    agent whether the list was cut and where to resume.
+    """
+    if offset < 0:
+        raise ValueError("offset must be zero or greater.")
+    selected = []
+    size = 0
+    for index in range(offset, len(items)):
+        data = serialize(index, items[index])
+        size += len(json.dumps(data)) + 2
+        if selected and size > max_chars:
+            break
+        selected.append(data)
+    next_offset = offset + len(selected)
+    return {
+        key: selected,
+        "total": len(items),
+        "offset": offset,
+        "returned": len(selected),
+        "truncated": next_offset < len(items),
+        "next_offset": next_offset if next_offset < len(items) else None
+    }
+
+
+def list_slides(service, presentation_id: str, offset: int = 0, max_chars: int = MAX_RESPONSE_CHARS) -> dict:
+    """
+    Lists one page of slides with their text.
+
+    Memory is bounded by LIST_SLIDES_FIELDS, which keeps the API response down
+    to IDs and text runs; summaries are then built only for the returned page.
+    """
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields=LIST_SLIDES_FIELDS
+    ).execute()
+    return shape_response(
+        presentation.get("slides", []), "slides", offset, max_chars,
+        slide_summary
+    )
 
 
 # ID Resolver Helper
@@ -320,10 +424,7 @@ def update_slide_position(service, presentation_id: str, slide_object_id: str, n
             "insertionIndex": new_index
         }
     }]
-    service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body={"requests": requests}
-    ).execute()
+    execute_batch_update(service, presentation_id, requests)
     return f"Slide {slide_object_id} moved to index {new_index}"
 
 # Replace all text
@@ -334,10 +435,7 @@ def replace_all_text(service, presentation_id: str, find_text: str, replace_text
             "replaceText": replace_text
         }
     }]
-    service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body={"requests": requests}
-    ).execute()
+    execute_batch_update(service, presentation_id, requests)
     return f"Replaced all instances of '{find_text}' with '{replace_text}'"
 
 # Delete text from a range
@@ -352,10 +450,7 @@ def delete_text_range(service, presentation_id: str, object_id: str, start_index
             }
         }
     }]
-    service.presentations().batchUpdate(
-        presentationId=presentation_id,
-        body={"requests": requests}
-    ).execute()
+    execute_batch_update(service, presentation_id, requests)
     return f"Deleted text in range {start_index}-{end_index} from {object_id}"
 
 
@@ -384,4 +479,789 @@ def share_presentation(drive_service, presentation_id: str, emails: list[str], r
             sendNotificationEmail=False
         ).execute()
 
-    return f"Presentation shared with: {', '.join(emails)} as '{role}'"
\ No newline at end of file
+    return f"Presentation shared with: {', '.join(emails)} as '{role}'"
+
+# tools.py (continuation: export pipeline)
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from googleapiclient.http import MediaIoBaseDownload
+
+# Root directory for rendered exports; one subdirectory per presentation and revision
+EXPORT_DIR = os.getenv("SLIDES_EXPORT_DIR", "exports")
+
+EXPORT_MIME_TYPES = {
+    "pdf": "application/pdf",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+THUMBNAIL_SIZES = ("SMALL", "MEDIUM", "LARGE")
+
+# Chunk size used when streaming exports and thumbnails to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_revision_id(service, presentation_id: str) -> str:
+    """
+    Returns the current revisionId of a presentation.
+    """
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="revisionId"
+    ).execute()
+    return presentation["revisionId"]
+
+
+# Revision directories being written to by this process, with the number of writers
+_revision_lock = threading.Lock()
+_active_revisions = Counter()
+
+
+@contextmanager
+def _revision_dir(output_dir: str, presentation_id: str, revision_id: str):
+    """
+    Yields the cache directory of a revision and removes the presentation's other revisions on success.
+
+    Directories still in use are kept: those another call in this process is
+    writing to, those holding a `.part` file of another process, and those
+    written to since this call started, which may belong to a newer revision.
+    """
+    deck_dir = os.path.join(output_dir, presentation_id)
+    path = os.path.join(deck_dir, revision_id)
+    started = time.time()
+    with _revision_lock:
+        _active_revisions[path] += 1
+        os.makedirs(path, exist_ok=True)
+    try:
+        yield path
+    finally:
+        with _revision_lock:
+            _active_revisions[path] -= 1
+            if not _active_revisions[path]:
+                del _active_revisions[path]
+    with _revision_lock:
+        for entry in os.listdir(deck_dir):
+            stale = os.path.join(deck_dir, entry)
+            if entry == revision_id or stale in _active_revisions or not os.path.isdir(stale):
+                continue
+            if os.path.getmtime(stale) >= started or any(name.endswith(".part") for name in os.listdir(stale)):
+                continue
+            shutil.rmtree(stale, ignore_errors=True)
+
+
+@contextmanager
+def _atomic_file(path: str):
+    """
+    Yields a uniquely named temporary file next to `path` and moves it into place on success.
+
+    Concurrent writers of the same path never share a temporary file, and a
+    failed write leaves nothing behind.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fh = tempfile.NamedTemporaryFile(dir=os.path.dirname(path), prefix=".", suffix=".part", delete=False)
+    try:
+        with fh:
+            yield fh
+        os.replace(fh.name, path)
+    except BaseException:
+        try:
+            os.remove(fh.name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def export_presentation(service, drive_service, presentation_id: str, export_format: str = "pdf",
+                        output_dir: str = EXPORT_DIR) -> dict:
+    """
+    Exports a presentation to PDF or PPTX through Drive `files().export`.
+
+    The file is streamed to disk in chunks and cached under its revisionId,
+    so an unchanged deck is never exported twice. Cached files of older
+    revisions are removed.
+
+    Returns:
+    - dict: path, revision_id and whether the result came from the cache
+    """
+    export_format = export_format.lower()
+    if export_format not in EXPORT_MIME_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}. Use one of {sorted(EXPORT_MIME_TYPES)}.")
+
+    revision_id = get_revision_id(service, presentation_id)
+    with _revision_dir(output_dir, presentation_id, revision_id) as revision_dir:
+        path = os.path.join(revision_dir, f"presentation.{export_format}")
+        if os.path.exists(path):
+            return {"path": path, "revision_id": revision_id, "cached": True}
+
+        request = drive_service.files().export_media(
+            fileId=presentation_id,
+            mimeType=EXPORT_MIME_TYPES[export_format]
+        )
+        with _atomic_file(path) as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while not done:
+                _, done = downloader.next_chunk()
+
+    return {"path": path, "revision_id": revision_id, "cached": False}
+
+
+def _download_to_file(url: str, path: str):
+    with requests.get(url, stream=True, timeout=60) as response:
+        response.raise_for_status()
+        with _atomic_file(path) as fh:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                fh.write(chunk)
+
+
+def export_slide_thumbnails(service_factory, presentation_id: str, size: str = "LARGE",
+                            max_workers: int = 4, output_dir: str = EXPORT_DIR) -> dict:
+    """
+    Renders every slide of a presentation to a PNG thumbnail.
+
+    Thumbnails are requested concurrently on a bounded thread pool and streamed
+    to disk. Files already rendered for the current revisionId are reused.
+
+    Parameters:
+    - service_factory: Callable returning a new authenticated Slides API service.
+      API clients are not thread-safe, so each worker thread builds its own.
+    - presentation_id (str): ID of the presentation
+    - size (str): Thumbnail size – "SMALL", "MEDIUM" or "LARGE"
+    - max_workers (int): Maximum number of concurrent thumbnail downloads
+    - output_dir (str): Root directory of the export cache
+
+    Returns:
+    - dict: revision_id, ordered list of thumbnail paths and the number served from cache
+    """
+    size = size.upper()
+    if size not in THUMBNAIL_SIZES:
+        raise ValueError(f"Unsupported thumbnail size: {size}. Use one of {list(THUMBNAIL_SIZES)}.")
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    presentation = service_factory().presentations().get(
+        presentationId=presentation_id,
+        fields="revisionId,slides.objectId"
+    ).execute()
+    revision_id = presentation["revisionId"]
+    slide_ids = [slide["objectId"] for slide in presentation.get("slides", [])]
+    local = threading.local()
+
+    def render(slide_id: str, path: str):
+        if not hasattr(local, "service"):
+            local.service = service_factory()
+        thumbnail = local.service.presentations().pages().getThumbnail(
+            presentationId=presentation_id,
+            pageObjectId=slide_id,
+            thumbnailProperties_mimeType="PNG",
+            thumbnailProperties_thumbnailSize=size
+        ).execute()
+        _download_to_file(thumbnail["contentUrl"], path)
+
+    with _revision_dir(output_dir, presentation_id, revision_id) as revision_dir:
+        paths = [
+            os.path.join(revision_dir, f"slide_{i:03d}_{slide_id}_{size.lower()}.png")
+            for i, slide_id in enumerate(slide_ids)
+        ]
+        pending = [(slide_id, path) for slide_id, path in zip(slide_ids, paths) if not os.path.exists(path)]
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                futures = [executor.submit(render, slide_id, path) for slide_id, path in pending]
+                for future in as_completed(futures):
+                    future.result()
+
+    return {
+        "revision_id": revision_id,
+        "thumbnails": paths,
+        "cached": len(paths) - len(pending)
+    }
+
+
+# tools.py (continuation: bulk slide operations)
+from bisect import bisect_left
+
+
+def _slide_ids(service, presentation_id: str) -> list[str]:
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides.objectId"
+    ).execute()
+    return [slide["objectId"] for slide in presentation.get("slides", [])]
+
+
+def _longest_increasing_subsequence(values: list[int]) -> set[int]:
+    """Returns the positions in `values` that form one longest strictly increasing run."""
+    tails, tail_positions, parents = [], [], [-1] * len(values)
+    for i, value in enumerate(values):
+        k = bisect_left(tails, value)
+        if k == len(tails):
+            tails.append(value)
+            tail_positions.append(i)
+        else:
+            tails[k] = value
+            tail_positions[k] = i
+        parents[i] = tail_positions[k - 1] if k else -1
+
+    keep = set()
+    i = tail_positions[-1] if tail_positions else -1
+    while i != -1:
+        keep.add(i)
+        i = parents[i]
+    return keep
+
+
+def plan_slide_moves(current_order: list[str], target_order: list[str]) -> list[dict]:
+    """
+    Computes the fewest `updateSlidesPosition` requests that turn `current_order` into `target_order`.
+
+    Slides on a longest common subsequence of both orders stay put; every other
+    slide is moved once, right after its predecessor in the target order.
+    """
+    if sorted(current_order) != sorted(target_order) or len(set(target_order)) != len(target_order):
+        raise ValueError("The new order must list every slide of the presentation exactly once.")
+
+    target_index = {slide_id: i for i, slide_id in enumerate(target_order)}
+    stationary = {current_order[i] for i in _longest_increasing_subsequence([target_index[s] for s in current_order])}
+
+    order = list(current_order)
+    requests = []
+    for i, slide_id in enumerate(target_order):
+        if slide_id in stationary:
+            continue
+        # insertionIndex refers to the arrangement before the move
+        insertion_index = order.index(target_order[i - 1]) + 1 if i else 0
+        requests.append({
+            "updateSlidesPosition": {
+                "slideObjectIds": [slide_id],
+                "insertionIndex": insertion_index
+            }
+        })
+        current = order.index(slide_id)
+        order.insert(insertion_index, slide_id)
+        order.pop(current if current < insertion_index else current + 1)
+    return requests
+
+
+def reorder_slides(service, presentation_id: str, slide_order: list[str]) -> str:
+    """
+    Rearranges all slides of a presentation into the given order in a single batchUpdate.
+
+    Inputs:
+    - service: Authenticated Slides API service
+    - presentation_id (str): ID of the presentation
+    - slide_order (list[str]): Every slide objectId, in the desired order
+
+    Returns:
+    - str: Confirmation message with the number of moves applied
+    """
+    requests = plan_slide_moves(_slide_ids(service, presentation_id), slide_order)
+    if requests:
+        execute_batch_update(service, presentation_id, requests)
+    return f"Reordered {len(slide_order)} slides with {len(requests)} moves"
+
+
+def delete_slides(service, presentation_id: str, slide_object_ids: list[str]) -> str:
+    """
+    Deletes several slides in a single batchUpdate.
+
+    Raises:
+    - ValueError: If any of the slides does not exist in the presentation
+    """
+    existing = set(_slide_ids(service, presentation_id))
+    missing = [slide_id for slide_id in slide_object_ids if slide_id not in existing]
+    if missing:
+        raise ValueError(f"Slides not found in presentation: {', '.join(missing)}")
+
+    requests = [{"deleteObject": {"objectId": slide_id}} for slide_id in dict.fromkeys(slide_object_ids)]
+    if requests:
+        execute_batch_update(service, presentation_id, requests)
+    return f"Deleted {len(requests)} slides"
+
+
+def _page_element_ids(elements: list) -> list[str]:
+    ids = []
+    for element in elements:
+        ids.append(element["objectId"])
+        ids.extend(_page_element_ids(element.get("elementGroup", {}).get("children", [])))
+    return ids
+
+
+def duplicate_slides(service, presentation_id: str, start_index: int, end_index: int,
+                     idempotency_key: Optional[str] = None) -> dict:
+    """
+    Duplicates the slides in [start_index, end_index] in a single batchUpdate.
+
+    The copies are inserted as one block directly after the original range,
+    keeping their relative order. Copy IDs are derived from the idempotency key,
+    so repeating the call with the same key does not duplicate the range again.
+
+    Returns:
+    - dict: Mapping of every original objectId (slides and their page elements) to its copy
+    """
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides(objectId,pageElements(objectId,elementGroup))"
+    ).execute()
+    slides = presentation.get("slides", [])
+    if not 0 <= start_index <= end_index < len(slides):
+        raise ValueError(f"Invalid slide range {start_index}-{end_index} for a presentation with {len(slides)} slides.")
+
+    check_existing = bool(idempotency_key)
+    idempotency_key = idempotency_key or new_idempotency_key()
+    requests = []
+    id_mapping = {}
+    copies = []
+    for slide in slides[start_index:end_index + 1]:
+        object_ids = {slide["objectId"]: make_object_id("slide", idempotency_key, slide["objectId"])}
+        for element_id in _page_element_ids(slide.get("pageElements", [])):
+            object_ids[element_id] = make_object_id("element", idempotency_key, element_id)
+        requests.append({
+            "duplicateObject": {
+                "objectId": slide["objectId"],
+                "objectIds": object_ids
+            }
+        })
+        id_mapping.update(object_ids)
+        copies.append(object_ids[slide["objectId"]])
+
+    # Each copy lands right after its original; gather them after the range
+    if len(copies) > 1:
+        requests.append({
+            "updateSlidesPosition": {
+                "slideObjectIds": copies,
+                "insertionIndex": start_index + 2 * len(copies)
+            }
+        })
+
+    execute_batch_update(service, presentation_id, requests, copies, check_existing=check_existing)
+    return id_mapping
+
+
+# tools.py (continuation: idempotent writes)
+import hashlib
+import time
+from googleapiclient.errors import HttpError
+
+# Retries for a batchUpdate that timed out or hit a transient API error
+BATCH_UPDATE_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 1.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def new_idempotency_key() -> str:
+    return uuid.uuid4().hex
+
+
+def make_object_id(prefix: str, idempotency_key: str, *parts: str) -> str:
+    """
+    Derives a deterministic objectId from an idempotency key.
+
+    The same key and parts always give the same ID, so a retried write targets
+    the objects created by the first attempt. 128 bits of SHA-256 make
+    collisions between different keys negligible.
+    """
+    digest = hashlib.sha256("\x1f".join((idempotency_key, *parts)).encode()).hexdigest()
+    return f"{prefix}_{digest[:32]}"
+
+
+def existing_object_ids(service, presentation_id: str, object_ids) -> set[str]:
+    """
+    Returns which of the given objectIds already exist as slides or page elements.
+    """
+    presentation = service.presentations().get(
+        presentationId=presentation_id,
+        fields="slides(objectId,pageElements(objectId,elementGroup))"
+    ).execute()
+    found = set()
+    for slide in presentation.get("slides", []):
+        found.add(slide["objectId"])
+        found.update(_page_element_ids(slide.get("pageElements", [])))
+    return found.intersection(object_ids)
+
+
+class QuotaLimiter:
+    """
+    Thread-safe pacer that spaces calls evenly at `per_minute` per minute.
+
+    It allows no bursts: each slot opens one interval after the previous one.
+    Every Slides batchUpdate in this module goes through `execute_batch_update`,
+    which acquires a slot before each attempt, so concurrent workers block here
+    instead of running into 429 responses.
+
+    Background callers (job workers) only take a slot while no interactive
+    caller is waiting, so a tool call waits at most about one interval even
+    while a fan-out job keeps the quota busy.
+    """
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute
+        self.condition = threading.Condition()
+        self.next_slot = time.monotonic()
+        self.interactive_waiting = 0
+
+    def acquire(self, background: bool = False):
+        with self.condition:
+            if not background:
+                self.interactive_waiting += 1
+            try:
+                while True:
+                    if background and self.interactive_waiting:
+                        self.condition.wait()
+                        continue
+                    now = time.monotonic()
+                    if now >= self.next_slot:
+                        break
+                    self.condition.wait(self.next_slot - now)
+                self.next_slot = now + self.interval
+            finally:
+                if not background:
+                    self.interactive_waiting -= 1
+                self.condition.notify_all()
+
+
+# Slides API default quota: 60 write requests per minute per user
+write_quota = QuotaLimiter(int(os.getenv("SLIDES_WRITES_PER_MINUTE", "60")))
+
+
+class WriteOutcomeUnknown(Exception):
+    """A batchUpdate failed in a way that may or may not have applied it, and could not be checked."""
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, HttpError):
+        return error.resp.status in RETRYABLE_STATUS_CODES
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+def _was_rejected(error: Exception) -> bool:
+    """True if the API turned the request away without applying it (rate limiting)."""
+    return isinstance(error, HttpError) and error.resp.status == 429
+
+
+def execute_batch_update(service, presentation_id: str, requests: list, created_ids=(),
+                         check_existing: bool = False, retries: int = BATCH_UPDATE_RETRIES,
+                         background: bool = False) -> Optional[dict]:
+    """
+    Runs a batchUpdate through the shared `write_quota`, retrying transient failures only when safe.
+
+    batchUpdate is atomic, so if any of `created_ids` exists the write already
+    went through and is skipped. That check runs before every retry, and also
+    before the first attempt when `check_existing` is set (e.g. when the caller
+    supplied the idempotency key and may be retrying a whole tool call).
+
+    A batch that creates no objects leaves nothing to check, so after a
+    timeout or server error it is not replayed: WriteOutcomeUnknown is raised
+    instead. Rate-limit rejections (429) are always retried.
+
+    Job workers pass `background` so interactive tool calls get quota first.
+
+    Returns:
+    - dict: The batchUpdate response, or None if the write had already been applied
+
+    Raises:
+    - WriteOutcomeUnknown: If a batch without created_ids failed after possibly being applied
+    """
+    for attempt in range(retries + 1):
+        if created_ids and (attempt or check_existing):
+            if existing_object_ids(service, presentation_id, created_ids):
+                return None
+        write_quota.acquire(background)
+        try:
+            return service.presentations().batchUpdate(
+                presentationId=presentation_id,
+                body={"requests": requests}
+            ).execute()
+        except Exception as error:
+            if not _is_retryable(error):
+                raise
+            if not created_ids and not _was_rejected(error):
+                raise WriteOutcomeUnknown(
+                    f"The update may or may not have been applied and was not retried: {error}"
+                ) from error
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+
+# tools.py (continuation: deck builds)
+def slide_requests(slide_id: str, spec: dict, idempotency_key: str, position: str) -> list[Request]:
+    """
+    Builds the requests that create one slide from a spec.
+
+    Spec format:
+    - texts (list[dict], optional): text boxes, each with `text` and optionally
+      font_family, font_size, color, align, bullet and layout
+    - images (list[dict], optional): images, each with `image_url` and optionally
+      width, height, x_offset and y_offset
+    """
+    requests = [{"createSlide": {"objectId": slide_id, "slideLayoutReference": {"predefinedLayout": "BLANK"}}}]
+    for j, text in enumerate(spec.get("texts", [])):
+        text = dict(text)
+        text_box_id = make_object_id("textbox", idempotency_key, position, str(j))
+        requests.extend(text_box_requests(text_box_id, slide_id, text.pop("text"), **text))
+    for j, image in enumerate(spec.get("images", [])):
+        requests.append(create_image_request(
+            make_object_id("image", idempotency_key, position, str(j)),
+            slide_id,
+            image["image_url"],
+            image.get("width", 300),
+            image.get("height", 200),
+            image.get("x_offset", 50),
+            image.get("y_offset", 100)
+        ))
+    return requests
+
+
+# Fields accepted in slide specs and their text and image entries, with the value types allowed for each
+NUMBER = (int, float)
+SLIDE_SPEC_FIELDS = {"texts": (list,), "images": (list,)}
+TEXT_SPEC_FIELDS = {
+    "text": (str,),
+    "font_family": (str, type(None)),
+    "font_size": (*NUMBER, type(None)),
+    "color": (str, type(None)),
+    "align": (str, type(None)),
+    "bullet": (bool,),
+    "layout": (str,),
+}
+IMAGE_SPEC_FIELDS = {"image_url": (str,), "width": NUMBER, "height": NUMBER, "x_offset": NUMBER, "y_offset": NUMBER}
+PARAGRAPH_ALIGNMENTS = ("START", "CENTER", "END", "JUSTIFIED")
+
+_TYPE_NAMES = {str: "a string", int: "an integer", float: "a number", bool: "true or false", list: "a list",
+               type(None): "null"}
+
+
+def _check_spec_fields(name: str, spec, fields: dict, required: Optional[str] = None):
+    """Raises ValueError unless `spec` is an object whose values have the types listed in `fields`."""
+    if not isinstance(spec, dict):
+        raise ValueError(f"Each {name} must be an object, got: {spec!r}")
+    unknown = sorted(set(spec) - set(fields))
+    if unknown:
+        raise ValueError(f"Unknown {name} field(s): {', '.join(unknown)}. Allowed: {', '.join(sorted(fields))}.")
+    if required and required not in spec:
+        raise ValueError(f"Each {name} needs the '{required}' field.")
+    for field, value in spec.items():
+        types = fields.get(field)
+        # bool is an int subclass, so it only counts when listed explicitly
+        if types and (not isinstance(value, types) or (isinstance(value, bool) and bool not in types)):
+            # Any number is fine where floats are
+            expected = " or ".join(_TYPE_NAMES[t] for t in types if not (t is int and float in types))
+            raise ValueError(f"Field '{field}' of {name} must be {expected}, got: {value!r}")
+
+
+def validate_slide_spec(spec: dict, extra_fields: Optional[dict] = None, name: str = "slide spec"):
+    """
+    Raises ValueError if a slide spec (see `slide_requests`) is malformed.
+
+    `extra_fields` lists additional top-level keys and their allowed types,
+    for objects that embed a slide spec.
+    """
+    _check_spec_fields(name, spec, {**SLIDE_SPEC_FIELDS, **(extra_fields or {})})
+    for text in spec.get("texts", []):
+        _check_spec_fields("text entry", text, TEXT_SPEC_FIELDS, "text")
+        if text.get("font_size") is not None and text["font_size"] <= 0:
+            raise ValueError(f"Text entry 'font_size' must be positive, got: {text['font_size']}")
+        if text.get("align") and text["align"].upper() not in PARAGRAPH_ALIGNMENTS:
+            raise ValueError(f"Unknown text alignment: {text['align']}. Use one of {list(PARAGRAPH_ALIGNMENTS)}.")
+    for image in spec.get("images", []):
+        _check_spec_fields("image entry", image, IMAGE_SPEC_FIELDS, "image_url")
+        for field in ("width", "height"):
+            if image.get(field, 1) <= 0:
+                raise ValueError(f"Image entry '{field}' must be positive, got: {image[field]}")
+    # Building the requests also rejects bad values such as unknown layouts or colors
+    slide_requests("validation", spec, "validation", "0")
+
+
+def validate_slide_specs(slides: list[dict]):
+    """Raises ValueError if the list of slide specs is empty or any spec is malformed."""
+    if not slides:
+        raise ValueError("At least one slide spec must be provided.")
+    for i, spec in enumerate(slides):
+        try:
+            validate_slide_spec(spec)
+        except ValueError as e:
+            raise ValueError(f"Slide {i}: {e}") from None
+
+
+def build_deck(service, presentation_id: str, slides: list[dict], idempotency_key: str,
+               start: int = 0, on_commit=None, background: bool = False) -> list[str]:
+    """
+    Appends slides built from specs (see `slide_requests`), one batchUpdate per slide.
+
+    Parameters:
+    - start (int): Number of slides already committed by an earlier run; building resumes there
+    - on_commit (callable, optional): Called with each new slide ID once its batchUpdate is committed
+    - background (bool): Take write quota only when no interactive call is waiting (see QuotaLimiter)
+
+    Returns:
+    - list[str]: IDs of all slides of the build, in order
+    """
+    slide_ids = [make_object_id("slide", idempotency_key, str(i)) for i in range(len(slides))]
+    for i in range(start, len(slides)):
+        requests = slide_requests(slide_ids[i], slides[i], idempotency_key, str(i))
+        # The slide may have been written just before an interruption
+        execute_batch_update(service, presentation_id, requests, [slide_ids[i]], check_existing=i == start,
+                             background=background)
+        if on_commit:
+            on_commit(slide_ids[i])
+    return slide_ids
+
+
+# tools.py (continuation: cross-presentation batch mode)
+def find_presentation_ids(drive_service, query: str) -> list[str]:
+    """
+    Returns the IDs of all presentations matching a Drive search query, e.g. "name contains 'Q3'".
+    """
+    presentation_ids = []
+    page_token = None
+    while True:
+        response = drive_service.files().list(
+            q=f"({query}) and mimeType='application/vnd.google-apps.presentation' and trashed=false",
+            spaces='drive',
+            fields="nextPageToken, files(id)",
+            pageSize=1000,
+            pageToken=page_token
+        ).execute()
+        presentation_ids.extend(file["id"] for file in response.get("files", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return presentation_ids
+
+
+def operation_requests(operation: dict, idempotency_key: str, position: str) -> tuple[list[Request], list[str]]:
+    """
+    Translates one fan-out operation into batchUpdate requests.
+
+    Supported operations:
+    - {"type": "replace_all_text", "find_text": ..., "replace_text": ..., "match_case": true}
+    - {"type": "add_slide", "texts": [...], "images": [...], "insertion_index": optional}
+      (slide spec as in `slide_requests`)
+
+    Returns:
+    - tuple: the requests and the IDs of the objects they create
+    """
+    op_type = operation.get("type")
+    if op_type == "replace_all_text":
+        return [{
+            "replaceAllText": {
+                "containsText": {"text": operation["find_text"], "matchCase": operation.get("match_case", True)},
+                "replaceText": operation["replace_text"]
+            }
+        }], []
+    if op_type == "add_slide":
+        slide_id = make_object_id("slide", idempotency_key, position)
+        requests = slide_requests(slide_id, operation, idempotency_key, position)
+        if "insertion_index" in operation:
+            requests[0]["createSlide"]["insertionIndex"] = operation["insertion_index"]
+        return requests, [slide_id]
+    raise ValueError(f"Unsupported operation type: {op_type}")
+
+
+# Fields accepted by each fan-out operation type, with their allowed value types;
+# add_slide also takes the fields of a slide spec
+REPLACE_ALL_TEXT_FIELDS = {"type": (str,), "find_text": (str,), "replace_text": (str,), "match_case": (bool,)}
+ADD_SLIDE_FIELDS = {"type": (str,), "insertion_index": (int,)}
+
+
+def _validate_operation(operation: dict):
+    if not isinstance(operation, dict):
+        raise ValueError(f"Each operation must be an object, got: {operation!r}")
+    op_type = operation.get("type")
+    if op_type == "replace_all_text":
+        _check_spec_fields("replace_all_text operation", operation, REPLACE_ALL_TEXT_FIELDS, "find_text")
+        if "replace_text" not in operation:
+            raise ValueError("Each replace_all_text operation needs the 'replace_text' field.")
+        if not operation["find_text"]:
+            raise ValueError("replace_all_text needs a non-empty 'find_text'.")
+    elif op_type == "add_slide":
+        validate_slide_spec(operation, ADD_SLIDE_FIELDS, "add_slide operation")
+        if operation.get("insertion_index", 0) < 0:
+            raise ValueError("add_slide 'insertion_index' must be zero or greater.")
+    else:
+        raise ValueError(f"Unsupported operation type: {op_type}")
+
+
+def validate_operations(operations: list[dict]):
+    """Raises ValueError if any operation is unsupported or malformed."""
+    if not operations:
+        raise ValueError("At least one operation must be provided.")
+    for i, operation in enumerate(operations):
+        try:
+            _validate_operation(operation)
+        except ValueError as e:
+            raise ValueError(f"Operation {i}: {e}") from None
+
+
+def operations_create_objects(operations: list[dict]) -> bool:
+    """True if the operations create objects, which makes retrying their batch safe."""
+    return any(operation.get("type") == "add_slide" for operation in operations)
+
+
+def apply_operations(service, presentation_id: str, operations: list[dict], idempotency_key: str,
+                     background: bool = False) -> list[str]:
+    """
+    Applies a list of operations to one presentation in a single atomic batchUpdate.
+
+    Returns:
+    - list[str]: IDs of the slides created by the operations
+    """
+    requests, created_ids = [], []
+    for i, operation in enumerate(operations):
+        op_requests, op_created = operation_requests(operation, idempotency_key, str(i))
+        requests.extend(op_requests)
+        created_ids.extend(op_created)
+    execute_batch_update(service, presentation_id, requests, created_ids, check_existing=True, background=background)
+    return created_ids
+
+
+def fan_out(service_factory, presentation_ids: list[str], operations: list[dict], idempotency_key: str,
+            max_workers: int = 8, on_start=None):
+    """
+    Applies the same operations to many presentations on a bounded thread pool.
+
+    Writes share `write_quota` as background callers, behind interactive tool
+    calls, and each worker thread authenticates once and reuses its service for
+    every deck it handles.
+
+    Parameters:
+    - on_start (callable, optional): Called with a presentation ID right before its batchUpdate
+
+    Yields:
+    - dict: per-deck presentation_id, status, seconds, and created slide IDs or
+      the error, in completion order. Status is "succeeded", "failed", or
+      "unknown" when the write may have been applied but could not be confirmed.
+    """
+    local = threading.local()
+
+    def apply(presentation_id: str) -> dict:
+        started = time.monotonic()
+        try:
+            if not hasattr(local, "service"):
+                local.service = service_factory()
+            if on_start:
+                on_start(presentation_id)
+            slide_ids = apply_operations(
+                local.service,
+                presentation_id,
+                operations,
+                f"{idempotency_key}:{presentation_id}",
+                background=True
+            )
+            result = {"presentation_id": presentation_id, "status": "succeeded", "slide_ids": slide_ids}
+        except WriteOutcomeUnknown as e:
+            result = {"presentation_id": presentation_id, "status": "unknown", "error": str(e)}
+        except Exception as e:
+            result = {"presentation_id": presentation_id, "status": "failed", "error": str(e)}
+        result["seconds"] = round(time.monotonic() - started, 3)
+        return result
+
+    if not presentation_ids:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(presentation_ids))) as executor:
+        futures = [executor.submit(apply, presentation_id) for presentation_id in presentation_ids]
+        for future in as_completed(futures):
+            yield future.result()